@@ -0,0 +1,42 @@
+import datetime
+import random
+from decimal import Decimal
+
+ENTRIES = 2000
+
+
+def bench_build_food_entry_nutrient_rows(benchmark, enrich_clients):
+    codes = enrich_clients.NORMALIZED_NUTRIENT_CODES
+    code_map = {code: n for n, code in enumerate(codes, start=1)}
+    rng = random.Random(42)
+    estimates = [
+        {
+            "food_entry_id": n,
+            "user_id": 1,
+            "date": "2026-09-15",
+            **{code: rng.uniform(0, 100) for code in codes if rng.random() > 0.1},
+        }
+        for n in range(ENTRIES)
+    ]
+    rows = benchmark(enrich_clients.build_food_entry_nutrient_rows, estimates, code_map)
+    assert len(rows) > ENTRIES * len(codes) * 0.8
+
+
+def bench_clean_food_log_rows(benchmark, enrich_clients):
+    rng = random.Random(42)
+    rows = [
+        {
+            "food_entry_id": n,
+            "food_name": f"Food {n % 50}",
+            "meal_type": "Lunch",
+            "date": datetime.date(2026, 9, 1 + n % 30),
+            "user_id": 1,
+            "calories": Decimal(f"{rng.uniform(40, 650):.2f}"),
+            "quantity": Decimal(f"{rng.uniform(0.5, 3):.3f}"),
+            "unit": "g",
+            "fatsecret_food_id": 1000 + n % 50,
+        }
+        for n in range(ENTRIES)
+    ]
+    cleaned = benchmark(enrich_clients.clean_food_log_rows, rows)
+    assert isinstance(cleaned[0]["calories"], float)
@@ -0,0 +1,38 @@
+from conftest import load
+from fatsecret_stub import food_entries_for_day
+
+DAYS = range(20600, 20630)
+
+
+def _food_entries():
+    entries = []
+    for date_int in DAYS:
+        for entry in food_entries_for_day("bench-token", date_int, 8):
+            entries.append({**entry, "user_id": 1})
+    return entries
+
+
+def bench_generate_oauth_signature(benchmark, fetch_clients):
+    sign = fetch_clients.fatsecret_client.generate_oauth_signature
+    params = {
+        "method": "food_entries.get",
+        "format": "json",
+        "date": "20615",
+        "oauth_consumer_key": "bench-consumer-key",
+        "oauth_token": "bench-token",
+        "oauth_nonce": "0f1e2d3c4b5a69788796a5b4c3d2e1f0",
+        "oauth_signature_method": "HMAC-SHA1",
+        "oauth_timestamp": "1790000000",
+        "oauth_version": "1.0",
+    }
+    signature = benchmark(sign, "GET", "https://platform.fatsecret.com/rest/server.api", params,
+                          "bench-consumer-secret", "bench-token-secret")
+    assert len(signature) == 28
+
+
+def bench_build_food_entry_values(benchmark, fetch_clients):
+    fetch_food_entries = load("fetch-fs-data", "fetch_food_entries")
+    entries = _food_entries()
+    values = benchmark(fetch_food_entries.build_food_entry_values, entries)
+    assert len(values) == len(entries)
+    assert len(values[0]) == len(fetch_food_entries.FOOD_ENTRY_COLUMNS)
@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime, timedelta
+
+from conftest import load
+
+ENTRIES = 40
+TODAY = datetime(2026, 10, 17)
+
+
+def _journal_page_html():
+    rows = []
+    for n in range(ENTRIES):
+        post_date = TODAY - timedelta(hours=6 * n)
+        photos = "".join(
+            f'<a href="/Default.aspx?pa=fjp&pid={n * 10 + p}"><img src="https://m.ftscrt.com/food/{uuid.UUID(int=n * 10 + p)}_sq.jpg"></a>'
+            for p in range(3)
+        )
+        rows.append(
+            f"<tr><td><h4>{post_date:%A, %B %d, %Y}</h4>"
+            f"<div class='journal'><p>Entry {n}: lunch and a walk.</p>{photos}</div></td></tr>"
+        )
+    return f"<html><body><table>{''.join(rows)}</table></body></html>"
+
+
+def bench_parse_journal_page(benchmark):
+    journal = load("parse-fs-site", "parse-journal-photos.py")
+    html = _journal_page_html()
+    entries, date_limit_reached = benchmark(journal.parse_journal_page, html, TODAY - timedelta(days=30))
+    assert len(entries) == ENTRIES * 3
+    assert not date_limit_reached
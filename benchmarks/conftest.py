@@ -0,0 +1,62 @@
+"""Shared helpers for the micro-benchmarks.
+
+Every script dir ships its own `clients` package, so modules are imported through `load()`, which
+gives each script dir a clean `clients` slot in sys.modules, like the ingestion daemon does.
+"""
+import importlib
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+# Importing the enrichment clients configures the Gemini SDK; nothing is sent during the benchmarks
+os.environ.setdefault("GEMINI_AI_API_KEY", "benchmark")
+
+_loaded = {}
+
+
+def _pop_clients_modules():
+    return {
+        name: sys.modules.pop(name)
+        for name in list(sys.modules)
+        if name == "clients" or name.startswith("clients.")
+    }
+
+
+def load(script_dir, module):
+    """Import `module` (a dotted name, or a .py file name) from scripts/`script_dir` and return it."""
+    key = (script_dir, module)
+    if key in _loaded:
+        return _loaded[key]
+
+    path = os.path.join(SCRIPTS_DIR, script_dir)
+    saved = _pop_clients_modules()
+    sys.path.insert(0, path)
+    try:
+        if module.endswith(".py"):
+            name = "bench_" + module[:-3].replace("-", "_")
+            spec = importlib.util.spec_from_file_location(name, os.path.join(path, module))
+            loaded = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(loaded)
+        else:
+            loaded = importlib.import_module(module)
+    finally:
+        sys.path.remove(path)
+        _pop_clients_modules()
+        sys.modules.update(saved)
+
+    _loaded[key] = loaded
+    return loaded
+
+
+@pytest.fixture(scope="session")
+def fetch_clients():
+    return load("fetch-fs-data", "clients")
+
+
+@pytest.fixture(scope="session")
+def enrich_clients():
+    return load("enrich-nutrition-details", "clients")
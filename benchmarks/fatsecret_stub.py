@@ -0,0 +1,323 @@
+"""Local stand-in for the FatSecret REST API, for offline fetch benchmarks and regression runs.
+
+Serves deterministic synthetic data for food_entries.get, exercise_entries.get, weights.get_month.v2
+and the food/exercise month summaries, validates OAuth 1.0 HMAC-SHA1 signatures, and can add
+latency and code-12 throttling. Token secrets are derived from the token: `<token>-secret`.
+
+    python benchmarks/fatsecret_stub.py --port 8765 --latency-ms 80 --max-rps 20
+    FATSECRET_API_URL=http://127.0.0.1:8765/rest/server.api python scripts/fetch-fs-data/...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from oauthlib.common import Request
+from oauthlib.oauth1.rfc5849 import signature
+
+STUB_CONSUMER_KEY = "bench-consumer-key"
+STUB_CONSUMER_SECRET = "bench-consumer-secret"
+STUB_PATH = "/rest/server.api"
+TIMESTAMP_SKEW_SECONDS = 300
+
+FOODS = [
+    ("Oatmeal", "g"), ("Banana", "medium"), ("Greek Yogurt", "g"), ("Chicken Breast", "g"),
+    ("Brown Rice", "cup"), ("Broccoli", "g"), ("Salmon", "g"), ("Apple", "medium"),
+    ("Almonds", "oz"), ("Whole Wheat Bread", "slice"), ("Eggs", "large"), ("Olive Oil", "tbsp"),
+]
+MEALS = ["Breakfast", "Lunch", "Dinner", "Other"]
+EXERCISES = [("Sleeping", 0.9), ("Walking", 3.5), ("Running", 9.8), ("Cycling", 7.5), ("Resting", 1.2)]
+
+
+def token_secret_for(token):
+    return f"{token}-secret"
+
+
+def verify_oauth_signature(url, oauth_signature, consumer_secret, token_secret):
+    """Check an HMAC-SHA1 signed GET `url` with oauthlib's RFC 5849 implementation.
+
+    Kept independent of the client's own signing code, so an encoding bug there fails validation.
+    """
+    request = Request(url, http_method="GET")
+    request.params = signature.collect_parameters(uri_query=urllib.parse.urlsplit(url).query)
+    request.signature = oauth_signature
+    return signature.verify_hmac_sha1(request, consumer_secret, token_secret)
+
+
+def _date_from_int(date_int):
+    return datetime.fromtimestamp(int(date_int) * 86400, tz=timezone.utc).date()
+
+
+def _month_date_ints(date_int):
+    day = _date_from_int(date_int)
+    first = datetime(day.year, day.month, 1, tzinfo=timezone.utc)
+    next_first = datetime(day.year + day.month // 12, day.month % 12 + 1, 1, tzinfo=timezone.utc)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return range((first - epoch).days, (next_first - epoch).days)
+
+
+def _rng(token, method, date_int):
+    return random.Random(f"{token}|{method}|{date_int}")
+
+
+def food_entries_for_day(token, date_int, entries_per_day):
+    rng = _rng(token, "food", date_int)
+    entries = []
+    for n in range(entries_per_day):
+        name, unit = rng.choice(FOODS)
+        calories = rng.uniform(40, 650)
+        entries.append({
+            "food_entry_id": str(int(date_int) * 1000 + n),
+            "food_entry_name": name,
+            "food_id": str(FOODS.index((name, unit)) + 1000),
+            "meal": MEALS[n % len(MEALS)],
+            "date_int": str(date_int),
+            "number_of_units": f"{rng.uniform(0.5, 3):.3f}",
+            "unit": unit,
+            "calories": f"{calories:.0f}",
+            "carbohydrate": f"{calories * rng.uniform(0.05, 0.15):.2f}",
+            "protein": f"{calories * rng.uniform(0.02, 0.08):.2f}",
+            "fat": f"{calories * rng.uniform(0.01, 0.05):.2f}",
+            "saturated_fat": f"{rng.uniform(0, 8):.2f}",
+            "polyunsaturated_fat": f"{rng.uniform(0, 4):.2f}",
+            "monounsaturated_fat": f"{rng.uniform(0, 6):.2f}",
+            "cholesterol": f"{rng.uniform(0, 120):.0f}",
+            "sodium": f"{rng.uniform(0, 600):.0f}",
+            "fiber": f"{rng.uniform(0, 6):.1f}",
+            "sugar": f"{rng.uniform(0, 20):.2f}",
+            "vitamin_a": f"{rng.uniform(0, 20):.0f}",
+            "vitamin_c": f"{rng.uniform(0, 30):.0f}",
+            "calcium": f"{rng.uniform(0, 25):.0f}",
+            "iron": f"{rng.uniform(0, 15):.0f}",
+        })
+    return entries
+
+
+def exercise_entries_for_day(token, date_int):
+    rng = _rng(token, "exercise", date_int)
+    minutes_left = 1440
+    entries = []
+    for name, kcal_per_minute in rng.sample(EXERCISES, 3):
+        minutes = minutes_left if name == "Sleeping" else rng.randint(10, 90)
+        minutes = min(minutes, minutes_left)
+        minutes_left -= minutes
+        entries.append({
+            "exercise_id": str(EXERCISES.index((name, kcal_per_minute)) + 1),
+            "exercise_name": name,
+            "minutes": str(minutes),
+            "calories": f"{minutes * kcal_per_minute:.0f}",
+        })
+    return entries
+
+
+def weight_for_day(token, date_int):
+    rng = _rng(token, "weight", date_int)
+    if rng.random() < 0.3:
+        return None
+    return f"{70 + 5 * ((int(date_int) % 60) / 60) + rng.uniform(-0.5, 0.5):.1f}"
+
+
+def build_response(method, token, date_int, entries_per_day):
+    """FatSecret-shaped JSON for one supported method, or an error payload."""
+    if method == "food_entries.get":
+        return {"food_entries": {"food_entry": food_entries_for_day(token, date_int, entries_per_day)}}
+    if method == "exercise_entries.get":
+        return {"exercise_entries": {"exercise_entry": exercise_entries_for_day(token, date_int)}}
+
+    month = _month_date_ints(date_int)
+    month_bounds = {"from_date_int": str(month[0]), "to_date_int": str(month[-1])}
+    if method == "weights.get_month.v2":
+        days = []
+        for day_int in month:
+            weight = weight_for_day(token, day_int)
+            if weight is not None:
+                days.append({"date_int": str(day_int), "weight_kg": weight})
+        return {"month": {"day": days, **month_bounds}}
+    if method == "food_entries.get_month":
+        days = []
+        for day_int in month:
+            entries = food_entries_for_day(token, day_int, entries_per_day)
+            totals = {f: sum(float(e[f]) for e in entries) for f in ("calories", "carbohydrate", "protein", "fat")}
+            days.append({"date_int": str(day_int), **{f: f"{v:.2f}" for f, v in totals.items()}})
+        return {"month": {"day": days, **month_bounds}}
+    if method == "exercise_entries.get_month":
+        days = [
+            {"date_int": str(day_int), "calories": f"{sum(float(e['calories']) for e in exercise_entries_for_day(token, day_int)):.0f}"}
+            for day_int in month
+        ]
+        return {"month": {"day": days, **month_bounds}}
+    return {"error": {"code": 3, "message": f"Unknown method: {method}"}}
+
+
+class StubState:
+    """Configuration and counters shared by every handler thread."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, throttle_probability=0.0, max_rps=0.0, entries_per_day=8):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_probability = throttle_probability
+        self.max_rps = max_rps
+        self.entries_per_day = entries_per_day
+        self.counters = {"requests": 0, "ok": 0, "throttled": 0, "invalid_signature": 0, "errors": 0}
+        self._seen_nonces = set()
+        self._tokens = max_rps
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def use_nonce(self, nonce, timestamp):
+        with self._lock:
+            if (nonce, timestamp) in self._seen_nonces:
+                return False
+            self._seen_nonces.add((nonce, timestamp))
+            return True
+
+    def should_throttle(self):
+        if self.throttle_probability and random.random() < self.throttle_probability:
+            return True
+        if not self.max_rps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._updated_at) * self.max_rps)
+            self._updated_at = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def delay(self):
+        latency = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "FatSecretStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _signature_error(self, params):
+        """Why the OAuth 1.0 signature of the request is not acceptable, or None when it is."""
+        if params.get("oauth_consumer_key") != STUB_CONSUMER_KEY:
+            return "Invalid consumer key"
+        if params.get("oauth_signature_method") != "HMAC-SHA1" or params.get("oauth_version", "1.0") != "1.0":
+            return "Unsupported signature method"
+        try:
+            if abs(time.time() - int(params.get("oauth_timestamp", 0))) > TIMESTAMP_SKEW_SECONDS:
+                return "Invalid timestamp"
+        except ValueError:
+            return "Invalid timestamp"
+        if not self.server.state.use_nonce(params.get("oauth_nonce"), params.get("oauth_timestamp")):
+            return "Nonce already used"
+
+        url = f"http://{self.headers.get('Host')}{self.path}"
+        if not verify_oauth_signature(url, params.get("oauth_signature", ""), STUB_CONSUMER_SECRET,
+                                      token_secret_for(params.get("oauth_token", ""))):
+            return "Invalid signature"
+        return None
+
+    def do_GET(self):
+        state = self.server.state
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/stats":
+            with state._lock:
+                self._send_json(dict(state.counters))
+            return
+        if url.path != STUB_PATH:
+            self._send_json({"error": {"code": 1, "message": "Not found"}}, status=404)
+            return
+
+        state.count("requests")
+        state.delay()
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+
+        error = self._signature_error(params)
+        if error:
+            state.count("invalid_signature")
+            self._send_json({"error": {"code": 8, "message": error}})
+            return
+        if state.should_throttle():
+            state.count("throttled")
+            self._send_json({"error": {"code": 12, "message": "User is performing too many actions"}})
+            return
+
+        try:
+            payload = build_response(params.get("method"), params["oauth_token"], int(params.get("date", 0)),
+                                     state.entries_per_day)
+        except Exception as e:
+            state.count("errors")
+            self._send_json({"error": {"code": 1, "message": str(e)}})
+            return
+        state.count("errors" if "error" in payload else "ok")
+        self._send_json(payload)
+
+
+def make_server(host="127.0.0.1", port=0, **config):
+    """Build (but do not start) the stub server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**config)
+    return server
+
+
+def api_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{STUB_PATH}"
+
+
+def add_stub_args(parser):
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter around --latency-ms')
+    parser.add_argument('--throttle-probability', type=float, default=0.0,
+                        help='Chance that any request is answered with error code 12')
+    parser.add_argument('--max-rps', type=float, default=0.0,
+                        help='Answer code 12 above this many requests per second (0 = unlimited)')
+    parser.add_argument('--entries-per-day', type=int, default=8, help='Synthetic food entries per day')
+
+
+def stub_config(args):
+    return {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "throttle_probability": args.throttle_probability,
+        "max_rps": args.max_rps,
+        "entries_per_day": args.entries_per_day,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local FatSecret API stand-in.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    add_stub_args(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = make_server(args.host, args.port, **stub_config(args))
+    print(f"🧪 FatSecret stub listening on {api_url(server)} "
+          f"(consumer key {STUB_CONSUMER_KEY!r}, secret {STUB_CONSUMER_SECRET!r})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
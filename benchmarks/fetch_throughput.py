@@ -0,0 +1,183 @@
+"""Fetch throughput benchmark: N users x M days through the unified fetcher against the FatSecret stub.
+
+Runs the same planner, fetch functions, adaptive rate limiter and HTTP client as
+scripts/fetch-fs-data/fetch_all_entries.py, without the database writes, and reports requests/s,
+wall time and p50/p99 latency twice: `http_*` times each HTTP round trip alone, `call_*` times each
+planned fetch end to end, including rate limiter waits, backoff and retries. `limiter_wait_s` is the
+time workers spent blocked in the limiter, summed over workers.
+
+    python benchmarks/fetch_throughput.py --users 3 --days 30 --workers 4 --latency-ms 80
+    python benchmarks/fetch_throughput.py --url http://127.0.0.1:8765/rest/server.api   # external stub
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from fatsecret_stub import (
+    STUB_CONSUMER_KEY,
+    STUB_CONSUMER_SECRET,
+    add_stub_args,
+    api_url,
+    make_server,
+    stub_config,
+    token_secret_for,
+)
+
+FETCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "fetch-fs-data")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def configure_client(url, rate):
+    """Point the fetch clients at the stub; must run before they are imported."""
+    os.environ["FATSECRET_API_URL"] = url
+    os.environ["CONSUMER_KEY"] = STUB_CONSUMER_KEY
+    os.environ["CONSUMER_SECRET"] = STUB_CONSUMER_SECRET
+    # Per-request client logs would drown the results; LOG_LEVEL=DEBUG still shows them
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Keep the benchmark from overwriting the production rate limiter's learned rate
+    os.environ["FATSECRET_RATE_STATE_FILE"] = os.path.join(tempfile.mkdtemp(), "fatsecret_rate.json")
+    if rate:
+        os.environ["FATSECRET_REQUESTS_PER_SECOND"] = str(rate)
+        os.environ["FATSECRET_MAX_REQUESTS_PER_SECOND"] = str(max(rate, float(os.getenv("FATSECRET_MAX_REQUESTS_PER_SECOND", 10))))
+    sys.path.insert(0, FETCH_DIR)
+
+
+def synthetic_users(count):
+    return [
+        {
+            "id": n,
+            "fatsecret_user_id": f"bench-{n}",
+            "access_token": f"bench-token-{n}",
+            "access_token_secret": token_secret_for(f"bench-token-{n}"),
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def run_benchmark(users, days, workers):
+    import fetch_all_entries
+    from clients import fatsecret_limiter
+    from clients.fatsecret_client import FatSecretClient
+
+    end = datetime(2026, 9, 30, tzinfo=timezone.utc)
+    start = end - timedelta(days=days - 1)
+    args = fetch_all_entries.parse_args(["--workers", str(workers), "--no-changed-only"])
+    plan = fetch_all_entries.plan_requests(synthetic_users(users), start, end, args)
+
+    http_latencies = []
+    limiter_waits = []
+    send_request = FatSecretClient.request
+    acquire = fatsecret_limiter.acquire
+
+    def timed_request(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return send_request(self, *args, **kwargs)
+        finally:
+            http_latencies.append(time.perf_counter() - started)
+
+    def timed_acquire(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return acquire(*args, **kwargs)
+        finally:
+            limiter_waits.append(time.perf_counter() - started)
+
+    def timed(method, user, day):
+        started = time.perf_counter()
+        entries = fetch_all_entries.FETCHERS[method](user['id'], user['access_token'], user['access_token_secret'], day)
+        return time.perf_counter() - started, entries
+
+    call_latencies = []
+    failures = 0
+    entries_fetched = 0
+    FatSecretClient.request = timed_request
+    fatsecret_limiter.acquire = timed_acquire
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(timed, *request) for request in plan]
+            for future in as_completed(futures):
+                latency, entries = future.result()
+                call_latencies.append(latency)
+                if entries is None:
+                    failures += 1
+                else:
+                    entries_fetched += len(entries)
+        wall = time.perf_counter() - started
+    finally:
+        FatSecretClient.request = send_request
+        del fatsecret_limiter.acquire  # drops the instance override of the class method
+
+    http_latencies.sort()
+    call_latencies.sort()
+    return {
+        "users": users,
+        "days": days,
+        "workers": workers,
+        "requests": len(plan),
+        "failures": failures,
+        "entries": entries_fetched,
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(len(plan) / wall, 2) if wall else 0.0,
+        "http_requests": len(http_latencies),
+        "http_p50_ms": round(percentile(http_latencies, 50) * 1000, 1),
+        "http_p99_ms": round(percentile(http_latencies, 99) * 1000, 1),
+        "call_p50_ms": round(percentile(call_latencies, 50) * 1000, 1),
+        "call_p99_ms": round(percentile(call_latencies, 99) * 1000, 1),
+        "limiter_wait_s": round(sum(limiter_waits), 3),
+        "limiter": fatsecret_limiter.stats(),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark fetch throughput against the FatSecret stub.")
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--rate', type=float, help='Starting requests/s of the client rate limiter (default: repo config)')
+    parser.add_argument('--url', help='Use an already running stub instead of starting one in-process')
+    parser.add_argument('--json', help='Also write the results to this file')
+    add_stub_args(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = make_server(**stub_config(args))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = api_url(server)
+
+    configure_client(url, args.rate)
+    print(f"🏁 {args.users} user(s) x {args.days} day(s), {args.workers} workers against {url}")
+    try:
+        results = run_benchmark(args.users, args.days, args.workers)
+        results["stub"] = requests.get(url.rsplit("/rest/", 1)[0] + "/stats", timeout=5).json()
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,23 @@
+# grafana/__init__.py
+
+from .grafana_client import (
+    GRAFANA_URL,
+    GRAFANA_API_KEY,
+    GRAFANA_WORKERS,
+    make_session,
+    mask_apitokens,
+    dashboard_hash,
+)
+from .log import get_logger, configure_logging, StructuredLogger
+
+__all__ = [
+    "GRAFANA_URL",
+    "GRAFANA_API_KEY",
+    "GRAFANA_WORKERS",
+    "make_session",
+    "mask_apitokens",
+    "dashboard_hash",
+    "get_logger",
+    "configure_logging",
+    "StructuredLogger",
+]
@@ -0,0 +1,52 @@
+# grafana/grafana_client.py
+
+import os
+import re
+import copy
+import json
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GRAFANA_URL = os.getenv("GRAFANA_URL")
+GRAFANA_API_KEY = os.getenv("GRAFANA_API_KEY")
+GRAFANA_WORKERS = int(os.getenv("GRAFANA_WORKERS", 8))
+
+# Fields Grafana bumps on every save; they say nothing about the dashboard's content
+VOLATILE_DASHBOARD_FIELDS = ("id", "version")
+
+
+def make_session(api_key=GRAFANA_API_KEY, pool_size=GRAFANA_WORKERS):
+    """One keep-alive session for all dashboard calls, sized for `pool_size` concurrent workers."""
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def mask_apitokens(dashboard):
+    """Replace apitoken values in dashboard link URLs with ******."""
+    for link in dashboard.get("links", []):
+        url = link.get("url")
+        if url:
+            link["url"] = re.sub(r"([?&]apitoken=)[^\"&]+", r"\1******", url)
+    return dashboard
+
+
+def dashboard_hash(dashboard):
+    """Content hash of a dashboard model, ignoring id/version and with API tokens masked."""
+    model = mask_apitokens(copy.deepcopy(dashboard))
+    for field in VOLATILE_DASHBOARD_FIELDS:
+        model.pop(field, None)
+    return hashlib.sha256(json.dumps(model, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
@@ -0,0 +1,111 @@
+# grafana/log.py
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 2000))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 1.0))
+
+_RESERVED_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+# Logger namespaces of this repo's scripts; LOG_LEVEL applies to these only
+PROJECT_LOGGERS = ("fetch", "enrich", "photos", "ingestion", "grafana")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg and the record's structured fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for interactive runs: `ts LEVEL logger: msg key=value ...`."""
+
+    def format(self, record):
+        line = f"{self.formatTime(record, '%Y-%m-%d %H:%M:%S')} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = getattr(record, "fields", {})
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def truncate(text, max_chars=LOG_PAYLOAD_MAX_CHARS):
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}… (+{len(text) - max_chars} chars)"
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger whose keyword arguments become structured fields: log.info("Rows written", rows=500)."""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _RESERVED_KWARGS}
+        kwargs["extra"] = {"fields": {**self.extra, **fields}}
+        return msg, kwargs
+
+    def bind(self, **fields):
+        """Child logger that adds `fields` to every record."""
+        return StructuredLogger(self.logger, {**self.extra, **fields})
+
+    def payload(self, msg, payload, **fields):
+        """DEBUG-only dump of a request/response payload, sampled and truncated to LOG_PAYLOAD_MAX_CHARS."""
+        if not self.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+            return
+        text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+        self.debug(msg, payload=truncate(text), payload_chars=len(text), **fields)
+
+    @contextmanager
+    def timed(self, stage, **fields):
+        """Log `stage` with its duration_ms when the block ends; at ERROR with the traceback when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(f"{stage} failed", stage=stage, exc_info=True,
+                       duration_ms=round((time.perf_counter() - started) * 1000, 1), **fields)
+            raise
+        self.info(f"{stage} done", stage=stage, duration_ms=round((time.perf_counter() - started) * 1000, 1), **fields)
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Send records to stdout once per process; later calls (e.g. another clients package) keep the first setup.
+
+    `level` is set on PROJECT_LOGGERS; the root logger, and with it boto3/urllib3/google SDK logging,
+    stays at WARNING so DEBUG runs do not dump wire traffic and signed headers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    for name in PROJECT_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+
+
+def get_logger(name):
+    configure_logging()
+    return StructuredLogger(logging.getLogger(name), {})
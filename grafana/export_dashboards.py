@@ -1,85 +1,83 @@
 #!/usr/bin/env python3
 import os
 import json
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import re
 
-from dotenv import load_dotenv
-
-load_dotenv()
+from clients import GRAFANA_URL, GRAFANA_WORKERS, make_session, mask_apitokens, get_logger
 
 # ======== CONFIGURATION ========
-GRAFANA_URL = os.getenv("GRAFANA_URL")
-API_KEY = os.getenv("GRAFANA_API_KEY")
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "./dashboards"))
 # ===============================
 
-HEADERS = {
-    "Authorization": f"Bearer {API_KEY}",
-    "Content-Type": "application/json"
-}
+log = get_logger("grafana.export")
 
 
-def fetch_all_dashboards():
+def fetch_all_dashboards(session):
     """Fetch the list of all dashboards."""
     url = f"{GRAFANA_URL}/api/search?type=dash-db&limit=5000"
-    response = requests.get(url, headers=HEADERS)
+    response = session.get(url, timeout=30)
     response.raise_for_status()
     return response.json()
 
 
-def mask_apitokens(data):
-    links = data.get("dashboard", {}).get("links", [])
-    for link in links:
-        url = link.get("url")
-        if url:
-            masked_url = re.sub(r"([?&]apitoken=)[^\"&]+", r"\1******", url)
-            link["url"] = masked_url
-    return data
-
-def export_dashboard(uid, title):
-    """Export a single dashboard by UID."""
+def export_dashboard(session, uid, title):
+    """Export a single dashboard by UID. Returns False when the file on disk is already up to date."""
     url = f"{GRAFANA_URL}/api/dashboards/uid/{uid}"
-    response = requests.get(url, headers=HEADERS)
+    response = session.get(url, timeout=30)
     response.raise_for_status()
-    dashboard = mask_apitokens(response.json())
+    dashboard = response.json()
+    mask_apitokens(dashboard.get("dashboard", {}))
 
     # Sanitize title for filesystem
     safe_title = "".join(c if c.isalnum() or c in " _-" else "_" for c in title)
     filepath = OUTPUT_DIR / f"{safe_title}.json"
 
+    content = json.dumps(dashboard, ensure_ascii=False, indent=2)
+    if filepath.exists() and filepath.read_text(encoding="utf-8") == content:
+        log.debug("Unchanged", file=str(filepath))
+        return False
+
     with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(dashboard, f, ensure_ascii=False, indent=2)
+        f.write(content)
 
-    print(f"✅ Exported: {filepath}")
+    log.info("Exported", file=str(filepath), uid=uid)
+    return True
 
 
 def main():
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    session = make_session()
 
-    print("📡 Fetching dashboards...")
-    dashboards = fetch_all_dashboards()
+    with log.timed("fetch dashboard list"):
+        dashboards = fetch_all_dashboards(session)
 
     if not dashboards:
-        print("⚠️  No dashboards found.")
+        log.warning("No dashboards found")
         return
 
-    for item in dashboards:
-        uid = item.get("uid")
-        title = item.get("title", "unnamed_dashboard")
+    exported = 0
+    with ThreadPoolExecutor(max_workers=GRAFANA_WORKERS) as executor:
+        futures = {}
+        for item in dashboards:
+            uid = item.get("uid")
+            title = item.get("title", "unnamed_dashboard")
+
+            # Skip dashboards containing "Preview" in the title (case-insensitive)
+            if "preview" in title.lower():
+                log.debug("Skipped preview dashboard", title=title)
+                continue
 
-        # Skip dashboards containing "Preview" in the title (case-insensitive)
-        if "preview" in title.lower():
-            print(f"⏭️  Skipped (preview): {title}")
-            continue
+            futures[executor.submit(export_dashboard, session, uid, title)] = title
 
-        try:
-            export_dashboard(uid, title)
-        except Exception as e:
-            print(f"❌ Failed to export {title}: {e}")
+        for future in as_completed(futures):
+            try:
+                if future.result():
+                    exported += 1
+            except Exception as e:
+                log.error("Failed to export", title=futures[future], error=str(e))
 
-    print(f"\n🎉 Export complete! Files saved to: {OUTPUT_DIR.resolve()}")
+    log.info("Export complete", changed=exported, dashboards=len(futures), output_dir=str(OUTPUT_DIR.resolve()))
 
 
 if __name__ == "__main__":
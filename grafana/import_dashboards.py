@@ -1,19 +1,31 @@
 import os
 import json
 import uuid
-import requests
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import sys
 import subprocess
 
-GRAFANA_URL = os.environ.get("GRAFANA_URL")
-GRAFANA_API_KEY = os.environ.get("GRAFANA_API_KEY")
+from clients import GRAFANA_URL, GRAFANA_API_KEY, GRAFANA_WORKERS, make_session, dashboard_hash, get_logger
+
 GRAFANA_API_TOKEN = os.environ.get("GRAFANA_API_TOKEN")
 INPUT_DIR = Path(os.getenv("INPUT_DIR", "./dashboards"))
 
+log = get_logger("grafana.import")
+
+
+def fetch_remote_hash(session, uid):
+    """Content hash of the dashboard currently stored in Grafana, or None if it does not exist."""
+    response = session.get(f"{GRAFANA_URL.rstrip('/')}/api/dashboards/uid/{uid}", timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return dashboard_hash(response.json().get("dashboard", {}))
 
-def import_dashboard(file_path, overwrite=False):
+
+def import_dashboard(session, file_path, latest_commit, overwrite=False, force=False):
+    """POST one dashboard file; returns False when it was skipped or failed."""
     with open(file_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
@@ -30,20 +42,22 @@ def import_dashboard(file_path, overwrite=False):
             url = link.get("url")
             if url and "apitoken=******" in url:
                 link["url"] = url.replace("apitoken=******", f"apitoken={GRAFANA_API_TOKEN}")
-                print(link["url"])
+                log.debug("Restored API token in dashboard link", file=os.path.basename(file_path))
 
     if overwrite:
         # Keep same UID if exists, overwrite=True
         dashboard["title"] = dashboard.get("title", "Unnamed")
         uid = dashboard["uid"]
+
+        if not force and dashboard_hash(dashboard) == fetch_remote_hash(session, uid):
+            log.debug("Unchanged", title=dashboard['title'], file=os.path.basename(file_path))
+            return False
     else:
         # Create preview version
         uid = generate_uid()
         dashboard["uid"] = uid
         dashboard["title"] = f"{dashboard.get('title', 'Unnamed')} (Preview) - {uid}"
 
-    latest_commit = get_latest_commit()
-
     payload = {
         "dashboard": dashboard,
         "folderId": meta.get("folderId", 0),
@@ -51,24 +65,21 @@ def import_dashboard(file_path, overwrite=False):
         "message": f"GIT Import - {latest_commit}"
     }
 
-    headers = {
-        "Authorization": f"Bearer {GRAFANA_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
     url = f"{GRAFANA_URL.rstrip('/')}/api/dashboards/db"
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+    response = session.post(url, data=json.dumps(payload), timeout=30)
 
     if response.status_code == 200:
         action = "Overwritten" if overwrite else "Imported (preview)"
         title = dashboard["title"]
-        print(f"✅ {action}: '{title}' from {os.path.basename(file_path)}. UUID: {uid}")
+        log.info(action, title=title, file=os.path.basename(file_path), uid=uid)
+        return True
     else:
         try:
             error = response.json()
         except Exception:
             error = response.text
-        print(f"❌ Failed: {os.path.basename(file_path)} — {response.status_code} — {error}")
+        log.error("Import failed", file=os.path.basename(file_path), status=response.status_code, error=error)
+        return False
 
 
 def generate_uid():
@@ -77,10 +88,10 @@ def generate_uid():
 
 def validate_env():
     if not GRAFANA_URL:
-        print("❌ Environment variable GRAFANA_URL is not set.")
+        log.error("Environment variable GRAFANA_URL is not set")
         sys.exit(1)
     if not GRAFANA_API_KEY:
-        print("❌ Environment variable GRAFANA_API_KEY is not set.")
+        log.error("Environment variable GRAFANA_API_KEY is not set")
         sys.exit(1)
 
 
@@ -101,17 +112,36 @@ def main():
     parser = argparse.ArgumentParser(description="Import Grafana dashboards via API.")
     parser.add_argument("path", nargs="?", default=INPUT_DIR, help="Path to dashboard file or directory")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing dashboards (default: False)")
+    parser.add_argument("--force", action="store_true", help="POST dashboards even if Grafana already has the same content")
     args = parser.parse_args()
-    print(f"overwrite {args.overwrite}")
+    log.info("Importing dashboards", path=str(args.path), overwrite=args.overwrite, force=args.force)
 
     path = Path(args.path)
     if path.is_dir():
-        for file in sorted(path.glob("*.json")):
-            import_dashboard(file, overwrite=args.overwrite)
+        files = sorted(path.glob("*.json"))
     elif path.is_file():
-        import_dashboard(path, overwrite=args.overwrite)
+        files = [path]
     else:
-        print("❌ Error: path is neither file nor directory")
+        log.error("Path is neither file nor directory", path=str(path))
+        return
+
+    session = make_session()
+    latest_commit = get_latest_commit()
+
+    imported = 0
+    with ThreadPoolExecutor(max_workers=GRAFANA_WORKERS) as executor:
+        futures = {
+            executor.submit(import_dashboard, session, file, latest_commit, args.overwrite, args.force): file
+            for file in files
+        }
+        for future in as_completed(futures):
+            try:
+                if future.result():
+                    imported += 1
+            except Exception as e:
+                log.error("Import failed", file=os.path.basename(futures[future]), error=str(e))
+
+    log.info("Import complete", posted=imported, dashboards=len(files))
 
 if __name__ == "__main__":
     main()
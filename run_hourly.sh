@@ -5,9 +5,8 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 DATE=$(date +"%Y-%m-%d_%H-%M")
 
 SCRIPTS=(
-  "./scripts/fetch-fs-data/fetch_food_entries.py"
-  "./scripts/fetch-fs-data/fetch_exercise_entries.py"
-  "./scripts/fetch-fs-data/fetch_weight.py"
+  "./scripts/enrich-nutrition-details/ensure-nutrient-partitions.py"
+  "./scripts/fetch-fs-data/fetch_all_entries.py"
 )
 
 source "$SCRIPT_DIR/venv/bin/activate"
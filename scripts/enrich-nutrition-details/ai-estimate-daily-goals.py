@@ -2,7 +2,9 @@ import json
 import time
 from datetime import datetime, timedelta, timezone
 import argparse
-from clients import exec_ai_request, get_all_users, get_user_details, insert_daily_nutrient_goals_normalized
+from clients import exec_ai_request, get_all_users, get_user_details, insert_daily_nutrient_goals_normalized, get_logger
+
+log = get_logger("enrich.daily_goals")
 
 nutrients = """
 - Calories (kcal)
@@ -128,9 +130,8 @@ Please calculate daily recommended intake based on these factors.
 
 
 if __name__ == "__main__":
-    print("🎯 Estimating daily micronutrient goals for all users...")
-
     args = parse_args()
+    log.info("Estimating daily micronutrient goals for all users")
 
     # Default to today if not provided
     today = datetime.now().replace(tzinfo=timezone.utc)
@@ -145,17 +146,17 @@ if __name__ == "__main__":
     users = get_all_users()
 
     if not users:
-        print("❌ No users found in the database")
+        log.error("No users found in the database")
         exit(1)
 
     for user in users:
-        print(f"👤 Processing user {user['id']} ({user['fatsecret_user_id']})")
+        log.info("Processing user", user_id=user['id'], fatsecret_user_id=user['fatsecret_user_id'])
 
         # Get user demographic details
         user_details = get_user_details(user['id'])
         
         if not user_details:
-            print(f"⚠️ No demographic details found for user {user['id']}, using conservative estimates")
+            log.warning("No demographic details found, using conservative estimates", user_id=user['id'])
             user_details = {}
 
         # Create full prompt with user details
@@ -173,14 +174,14 @@ if __name__ == "__main__":
                 
                 # Insert the daily goals into normalized table
                 insert_daily_nutrient_goals_normalized([daily_goals])
-                print(f"✅ Estimated daily goals for user {user['id']}")
+                log.info("Estimated daily goals", user_id=user['id'], date=daily_goals['date'])
             else:
-                print(f"❌ Invalid AI response format for user {user['id']}")
+                log.error("Invalid AI response format", user_id=user['id'])
                 
         except Exception as e:
-            print(f"❌ Error processing user {user['id']}: {e}")
+            log.error("Error processing user", user_id=user['id'], error=str(e))
             continue
 
         time.sleep(2)  # Delay between users
 
-    print("🎉 Daily micronutrient goals estimation completed!") 
\ No newline at end of file
+    log.info("Daily micronutrient goals estimation completed", users=len(users)) 
\ No newline at end of file
@@ -1,9 +1,30 @@
 import argparse
+import hashlib
 import json
-import time
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
-from clients import exec_ai_request, get_all_users, get_food_log_entries_by_date, insert_food_entry_nutrients_normalized
+from clients import (
+    exec_ai_request,
+    GEMINI_MODEL,
+    get_all_users,
+    get_food_log_entries_by_date,
+    insert_food_entry_nutrients_normalized,
+    NORMALIZED_NUTRIENT_CODES,
+    make_food_cache_key,
+    get_cached_nutrient_estimates,
+    upsert_cached_nutrient_estimates,
+    get_logger,
+    GEMINI_MAX_CONCURRENCY,
+)
+
+FLUSH_EVERY_ENTRIES = int(os.getenv("NUTRIENT_FLUSH_EVERY_ENTRIES", 2000))
+CACHE_TTL_DAYS = int(os.getenv("NUTRIENT_CACHE_TTL_DAYS", 90))
+CHUNK_MAX_ENTRIES = int(os.getenv("LLM_CHUNK_MAX_ENTRIES", 40))
+CHUNK_MAX_CHARS = int(os.getenv("LLM_CHUNK_MAX_CHARS", 6000))
+
+log = get_logger("enrich.nutrition_details")
 
 nutrients = """
 - Carbohydrate (g)
@@ -67,18 +88,118 @@ DO NOT include any additional text, explanations, or code block delimiters (e.g.
 
 """
 
+# Cached estimates are only reused while the model and the prompt stay the same
+CACHE_VERSION = hashlib.sha256(f"{GEMINI_MODEL}\n{prompt}".encode()).hexdigest()[:16]
 
-def parse_args():
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch and insert food entries.")
     parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
-    return parser.parse_args()
+    parser.add_argument('--full', action='store_true',
+                        help='Re-estimate every entry in the window, not only entries without up-to-date nutrients')
+    parser.add_argument('--no-cache', action='store_true', help='Send every entry to the LLM and skip the estimate cache')
+    return parser.parse_args(argv)
 
 
-if __name__ == "__main__":
-    print("📥 Fetching food entries for all users...")
+def entry_cache_key(entry):
+    return make_food_cache_key(entry['food_name'], entry.get('fatsecret_food_id'), entry.get('unit'))
+
+
+def split_cached_entries(user_food_log):
+    """Return (estimates built from the cache, entries that still need the LLM)."""
+    cacheable = [entry for entry in user_food_log if entry.get('quantity')]
+    cached = get_cached_nutrient_estimates([entry_cache_key(entry) for entry in cacheable], CACHE_VERSION, CACHE_TTL_DAYS)
+
+    estimates = []
+    misses = []
+    for entry in user_food_log:
+        per_unit = cached.get(entry_cache_key(entry)) if entry.get('quantity') else None
+        if per_unit is None:
+            misses.append(entry)
+            continue
+        estimate = {code: value * entry['quantity'] for code, value in per_unit.items()}
+        estimate['food_entry_id'] = entry['food_entry_id']
+        estimates.append(estimate)
+    return estimates, misses
+
+
+def cache_new_estimates(nutrition_estimates, entries_by_id):
+    """Store LLM estimates as per-unit nutrient vectors, keyed by the entry's normalized food."""
+    per_unit_estimates = {}
+    for nutrition_estimate in nutrition_estimates:
+        entry = entries_by_id.get(nutrition_estimate.get('food_entry_id'))
+        if not entry or not entry.get('quantity'):
+            continue
+        per_unit_estimates[entry_cache_key(entry)] = {
+            code: float(nutrition_estimate[code]) / entry['quantity']
+            for code in NORMALIZED_NUTRIENT_CODES
+            if isinstance(nutrition_estimate.get(code), (int, float))
+        }
+    upsert_cached_nutrient_estimates(per_unit_estimates, CACHE_VERSION)
+
+
+def food_log_prompt_line(entry):
+    return {'food_name': entry['food_name'], 'calories': entry['calories'], 'quantity': entry['quantity']}
+
+
+def chunk_food_log(food_log, max_entries=CHUNK_MAX_ENTRIES, max_chars=CHUNK_MAX_CHARS):
+    """Split the food log into chunks bounded by entry count and by the size of their prompt lines."""
+    chunks = []
+    chunk = []
+    chunk_chars = 0
+    for entry in food_log:
+        entry_chars = len(str(food_log_prompt_line(entry))) + len(str(entry['food_entry_id']))
+        if chunk and (len(chunk) >= max_entries or chunk_chars + entry_chars > max_chars):
+            chunks.append(chunk)
+            chunk = []
+            chunk_chars = 0
+        chunk.append(entry)
+        chunk_chars += entry_chars
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
 
-    args = parse_args()
+def estimate_chunk(chunk):
+    user_food_log_for_prompt = {entry['food_entry_id']: food_log_prompt_line(entry) for entry in chunk}
+
+    full_prompt = prompt + f"""
+    Food log:
+    {user_food_log_for_prompt}
+    """
+
+    return exec_ai_request(full_prompt)
+
+
+def estimate_with_llm(food_log, use_cache):
+    """Prompt the LLM chunk by chunk, at most GEMINI_MAX_CONCURRENCY chunks in flight, and merge the results.
+
+    exec_ai_request retries each chunk on its own; a chunk that still fails is skipped and left
+    for the next incremental run instead of failing the whole user.
+    """
+    chunks = chunk_food_log(food_log)
+    log.info("Sending entries to the LLM", entries=len(food_log), chunks=len(chunks))
+
+    estimates = []
+    with ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY) as executor:
+        futures = {executor.submit(estimate_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                chunk_estimates = future.result()
+            except Exception as e:
+                log.error("LLM chunk failed", entries=len(chunk), error=str(e))
+                continue
+            if use_cache:
+                cache_new_estimates(chunk_estimates, {entry['food_entry_id']: entry for entry in chunk})
+            estimates.extend(chunk_estimates)
+    return estimates
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log.info("Enriching food entries for all users")
 
     # Default to yesterday and today if not provided
     today = datetime.now().replace(tzinfo=timezone.utc)
@@ -93,34 +214,38 @@ if __name__ == "__main__":
     users = get_all_users()
 
     if not users:
-        print("❌ No users found in the database")
+        log.error("No users found in the database")
         exit(1)
 
+    pending_estimates = []
+
     for user in users:
-        print(f"👤 Processing user {user['id']} ({user['fatsecret_user_id']})")
+        log.info("Processing user", user_id=user['id'], fatsecret_user_id=user['fatsecret_user_id'])
 
-        user_food_log = get_food_log_entries_by_date(start, end, user['id'])
-        user_food_log_for_prompt = {
-            entry['food_entry_id']:
-                {'food_name': entry['food_name'], 'calories': entry['calories'], 'quantity': entry['quantity']} for
-            entry in user_food_log
-        }
+        user_food_log = get_food_log_entries_by_date(start, end, user['id'], only_unenriched=not args.full)
+        if not user_food_log:
+            log.info("Nothing to enrich", user_id=user['id'])
+            continue
 
-        full_prompt = prompt + f"""
-        Food log:
-        {user_food_log_for_prompt}
-        """
+        if args.no_cache:
+            nutrition_estimates, uncached_food_log = [], user_food_log
+        else:
+            nutrition_estimates, uncached_food_log = split_cached_entries(user_food_log)
+            log.info("Estimate cache lookup", user_id=user['id'], hits=len(nutrition_estimates), misses=len(uncached_food_log))
 
-        nutrition_estimates = exec_ai_request(full_prompt)
+        if uncached_food_log:
+            with log.timed("estimate with LLM", user_id=user['id'], entries=len(uncached_food_log)):
+                nutrition_estimates.extend(estimate_with_llm(uncached_food_log, use_cache=not args.no_cache))
 
-        # Create a mapping of food_entry_id to meal_type and date for enrichment
+        # Create a mapping of food_entry_id to user_id, meal_type and date for enrichment
         food_entry_mapping = {entry['food_entry_id']: {'user_id': entry['user_id'], 'meal_type': entry['meal_type'], 'date': entry['date']} for entry in
                               user_food_log}
 
         for nutrition_estimate in nutrition_estimates:
-            # Enrich the nutrition estimate with meal_type and date from the original food entry
+            # Enrich the nutrition estimate with user_id, meal_type and date from the original food entry
             food_entry_id = nutrition_estimate.get('food_entry_id')
             if food_entry_id and food_entry_id in food_entry_mapping:
+                nutrition_estimate['user_id'] = food_entry_mapping[food_entry_id]['user_id']
                 nutrition_estimate['meal_type'] = food_entry_mapping[food_entry_id]['meal_type']
                 # Convert date to string format if it's a date object
                 date_value = food_entry_mapping[food_entry_id]['date']
@@ -129,7 +254,16 @@ if __name__ == "__main__":
                 else:
                     nutrition_estimate['date'] = str(date_value)
 
-            # Write to normalized table
-            insert_food_entry_nutrients_normalized([nutrition_estimate])
+            pending_estimates.append(nutrition_estimate)
+
+        # Flush periodically so a long backfill does not keep everything in memory
+        if len(pending_estimates) >= FLUSH_EVERY_ENTRIES:
+            insert_food_entry_nutrients_normalized(pending_estimates)
+            pending_estimates = []
 
-        time.sleep(5)  # Delay between users
+    # Write the remaining estimates of the run in one batched transaction
+    insert_food_entry_nutrients_normalized(pending_estimates)
+
+
+if __name__ == "__main__":
+    main()
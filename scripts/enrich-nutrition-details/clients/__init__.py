@@ -1,22 +1,50 @@
 # __init__.py
-from .gemini_client import exec_ai_request
+from .gemini_client import exec_ai_request, GEMINI_MODEL, GEMINI_MAX_CONCURRENCY
+from .log import get_logger, configure_logging, StructuredLogger
 from .pg_client import (
     get_all_users,
     get_food_log_entries_by_date,
+    clean_food_log_rows,
     insert_nutrient_data,
     get_user_details,
     insert_daily_micronutrient_goals,
     insert_food_entry_nutrients_normalized,
     insert_daily_nutrient_goals_normalized,
+    get_connection,
+    close_pool,
+    NORMALIZED_NUTRIENT_CODES,
+    build_food_entry_nutrient_rows,
+    make_food_cache_key,
+    get_cached_nutrient_estimates,
+    upsert_cached_nutrient_estimates,
+    rebuild_daily_nutrient_rollup,
+    ensure_nutrient_partitions,
+    NUTRIENT_PARTITION_MONTHS_AHEAD,
 )
 
 __all__ = [
     "exec_ai_request",
+    "GEMINI_MODEL",
+    "GEMINI_MAX_CONCURRENCY",
+    "get_logger",
+    "configure_logging",
+    "StructuredLogger",
     "get_all_users",
     "get_food_log_entries_by_date",
+    "clean_food_log_rows",
     "insert_nutrient_data",
     "get_user_details",
     "insert_daily_micronutrient_goals",
     "insert_food_entry_nutrients_normalized",
     "insert_daily_nutrient_goals_normalized",
+    "get_connection",
+    "close_pool",
+    "NORMALIZED_NUTRIENT_CODES",
+    "build_food_entry_nutrient_rows",
+    "make_food_cache_key",
+    "get_cached_nutrient_estimates",
+    "upsert_cached_nutrient_estimates",
+    "rebuild_daily_nutrient_rollup",
+    "ensure_nutrient_partitions",
+    "NUTRIENT_PARTITION_MONTHS_AHEAD",
 ]
@@ -2,30 +2,60 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 import json
+import threading
 import time
+from .log import get_logger
 
 load_dotenv()
 
 GEMINI_AI_API_KEY = os.getenv("GEMINI_AI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
 
 if not GEMINI_AI_API_KEY:
     raise ValueError("Missing GEMINI_AI_API_KEY environment variable.")
 
 genai.configure(api_key=GEMINI_AI_API_KEY)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = genai.GenerativeModel(GEMINI_MODEL)
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+
+log = get_logger("enrich.gemini")
+
+# Caps in-flight requests across threads; a 429 on any thread pauses all of them
+_request_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+_cooldown_lock = threading.Lock()
+_cooldown_until = 0.0
+
+
+def _wait_for_cooldown():
+    while True:
+        with _cooldown_lock:
+            remaining = _cooldown_until - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(remaining)
+
+
+def _start_cooldown(seconds):
+    global _cooldown_until
+    with _cooldown_lock:
+        _cooldown_until = max(_cooldown_until, time.monotonic() + seconds)
 
 def exec_ai_request(prompt: str, retries=3, backoff_factor=2.0) -> []:
-    print("Sending prompt:")
-    print(prompt)
-    print(">>>>")
+    log.payload("Sending prompt", prompt, prompt_chars=len(prompt))
 
     attempt = 0
     while attempt <= retries:
         try:
-            response = model.generate_content(prompt.strip())
+            _wait_for_cooldown()
+            with _request_slots:
+                started = time.perf_counter()
+                response = model.generate_content(prompt.strip())
             raw_text = response.text
-            print(f"Raw text: {raw_text}")
+            log.info("Gemini response", model=GEMINI_MODEL, attempt=attempt + 1, prompt_chars=len(prompt),
+                     response_chars=len(raw_text), duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            log.payload("Raw response", raw_text)
 
             cleaned_response = raw_text.strip()
             return json.loads(cleaned_response)
@@ -33,14 +63,14 @@ def exec_ai_request(prompt: str, retries=3, backoff_factor=2.0) -> []:
         except Exception as e:
             attempt += 1
             if attempt > retries:
-                print("❌ Maximum retries reached. Giving up.")
+                log.error("Maximum retries reached, giving up", attempts=attempt, error=str(e))
                 raise ValueError(str(e))
 
+            sleep_time = backoff_factor ** attempt
             if "429" in str(e):
-                print(f"⚠️ Rate limit error on attempt {attempt}/{retries}: {e}")
+                log.warning("Rate limited, retrying", attempt=attempt, retries=retries, delay_s=sleep_time, error=str(e))
+                _start_cooldown(sleep_time)
             else:
-                print(f"❌ API error on attempt {attempt}/{retries}: {e}")
+                log.warning("API error, retrying", attempt=attempt, retries=retries, delay_s=sleep_time, error=str(e))
 
-            sleep_time = backoff_factor ** attempt
-            print(f"⏳ Retrying in {sleep_time:.1f} seconds...")
             time.sleep(sleep_time)
@@ -1,10 +1,17 @@
 # fatsecret/pg_client.py
 
 import os
-import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import execute_values, RealDictCursor, Json
 from dotenv import load_dotenv
+from .log import get_logger
+from .queries import FOOD_LOG_QUERY, UNENRICHED_FILTER
 from decimal import Decimal
+import datetime
 
 load_dotenv()
 
@@ -13,61 +20,98 @@ PG_PORT = os.getenv("PG_PORT", 5432)
 PG_USER = os.getenv("PG_USER")
 PG_PASSWORD = os.getenv("PG_PASSWORD")
 PG_DB = os.getenv("PG_DB")
-
-
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", 1))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", 5))
+NUTRIENT_WRITE_PAGE_SIZE = int(os.getenv("NUTRIENT_WRITE_PAGE_SIZE", 1000))
+NUTRIENT_PARTITION_MONTHS_AHEAD = int(os.getenv("NUTRIENT_PARTITION_MONTHS_AHEAD", 3))
+
+# Nutrient fact tables range-partitioned by month on `date`
+PARTITIONED_NUTRIENT_TABLES = ("food_entry_nutrients", "estimated_food_nutrients_v2")
+
+log = get_logger("enrich.pg_client")
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when exhausted; the semaphore makes callers wait
+_pool_slots = threading.BoundedSemaphore(PG_POOL_MAX)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    PG_POOL_MIN,
+                    PG_POOL_MAX,
+                    host=PG_HOST,
+                    port=PG_PORT,
+                    user=PG_USER,
+                    password=PG_PASSWORD,
+                    dbname=PG_DB
+                )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
 def get_connection():
-    return psycopg2.connect(
-        host=PG_HOST,
-        port=PG_PORT,
-        user=PG_USER,
-        password=PG_PASSWORD,
-        dbname=PG_DB
-    )
+    """Borrow a pooled connection; rolls back on error and always returns it to the pool."""
+    with _pool_slots:
+        pool = get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
 
 
 def get_all_users():
     try:
-        conn = get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
-            SELECT u.id, u.fatsecret_user_id, t.access_token, t.access_token_secret
-            FROM personal_data.users u
-            JOIN personal_data.access_tokens t ON u.id = t.user_id
-        """)
-        users = cursor.fetchall()
-        return users
+        with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT u.id, u.fatsecret_user_id, t.access_token, t.access_token_secret
+                FROM personal_data.users u
+                JOIN personal_data.access_tokens t ON u.id = t.user_id
+            """)
+            users = cursor.fetchall()
+            return users
     except Exception as e:
-        print(f"❌ DB error getting users: {e}")
+        log.error("DB error getting users", error=str(e))
         raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
 
 
 def get_user_details(user_id):
     """Get user demographic details for calculating daily goals"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
-            SELECT ud.gender, ud.age, ud.weight_kg, ud.height_cm, ud.activity_level, ud.pregnancy_status
-            FROM personal_data.user_details ud
-            WHERE ud.user_id = %s
-        """, (user_id,))
-        user_details = cursor.fetchone()
-        return user_details
+        with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT ud.gender, ud.age, ud.weight_kg, ud.height_cm, ud.activity_level, ud.pregnancy_status
+                FROM personal_data.user_details ud
+                WHERE ud.user_id = %s
+            """, (user_id,))
+            user_details = cursor.fetchone()
+            return user_details
     except Exception as e:
-        print(f"❌ DB error getting user details: {e}")
+        log.error("DB error getting user details", user_id=user_id, error=str(e))
         return None
-    finally:
-        cursor.close()
-        conn.close()
 
 
 def insert_daily_micronutrient_goals(goals_data_list):
     """Insert daily micronutrient goals for users"""
     if not goals_data_list:
-        print("⚠️ No goals data to insert.")
+        log.info("No goals data to insert")
         return
 
     keys = list(goals_data_list[0].keys())
@@ -82,22 +126,18 @@ def insert_daily_micronutrient_goals(goals_data_list):
     """
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        execute_values(cursor, sql, goals_data_list, template=f"({placeholders})")
-        conn.commit()
-        print(f"✅ Inserted/updated {len(goals_data_list)} daily goals records.")
+        with get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, sql, goals_data_list, template=f"({placeholders})")
+            conn.commit()
+            log.info("Upserted daily goals records", rows=len(goals_data_list))
     except Exception as e:
-        print(f"❌ DB error inserting daily goals: {e}")
+        log.error("DB error inserting daily goals", error=str(e))
         raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
 
 
 def insert_nutrient_data(nutrient_data_list):
     if not nutrient_data_list:
-        print("⚠️ No nutrient data to insert.")
+        log.info("No nutrient data to insert")
         return
 
     keys = list(nutrient_data_list[0].keys())
@@ -112,62 +152,51 @@ def insert_nutrient_data(nutrient_data_list):
     """
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        execute_values(cursor, sql, nutrient_data_list, template=f"({placeholders})")
-        conn.commit()
-        print(f"✅ Inserted/updated {len(nutrient_data_list)} nutrient records.")
+        with get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, sql, nutrient_data_list, template=f"({placeholders})")
+            conn.commit()
+            log.info("Upserted nutrient records", rows=len(nutrient_data_list))
     except Exception as e:
-        print(f"❌ DB error inserting nutrient data: {e}")
+        log.error("DB error inserting nutrient data", error=str(e))
         raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
-
-
-def get_food_log_entries_by_date(start, end, user):
-    food_log_cols = [
-        "id AS food_entry_id",
-        "food_name",
-        "meal_type",
-        "date",
-        "user_id",
-        "calories",
-        "quantity"
+
+
+def clean_food_log_rows(rows):
+    """Plain dicts with NUMERIC (Decimal) columns turned into floats."""
+    return [
+        {
+            key: float(value) if isinstance(value, Decimal) else value
+            for key, value in dict(row).items()
+        }
+        for row in rows
     ]
+
+
+def get_food_log_entries_by_date(start, end, user, only_unenriched=False):
+    """Food entries of `user` between `start` and `end`.
+
+    With `only_unenriched`, entries that already have nutrient rows written after their last
+    change (food_entries.updated_at) are left out.
+    """
+    query = FOOD_LOG_QUERY + (UNENRICHED_FILTER if only_unenriched else "")
+    params = {"user": user, "start": start, "end": end}
     try:
-        conn = get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        query = f"""
-            SELECT {', '.join(food_log_cols)}
-            FROM personal_data.food_entries
-            WHERE user_id = {user}
-            AND date BETWEEN date('{start}') AND date('{end}')
-        """
-
-        print(f" SQL {query} ")
-        print(">>>>")
-
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        clean_results = [
-            {
-                key: float(value) if isinstance(value, Decimal) else value
-                for key, value in dict(row).items()
-            }
-            for row in results
-        ]
-
-        print(f"Results {clean_results}")
-        return clean_results
+        with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            log.payload("Food log query", query, user_id=user)
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+
+            clean_results = clean_food_log_rows(results)
+
+            log.info("Fetched food log", user_id=user, start=start, end=end, entries=len(clean_results),
+                     only_unenriched=only_unenriched, duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            log.payload("Food log entries", clean_results, user_id=user)
+            return clean_results
 
     except Exception as e:
-        print(f"❌ DB error fetching food logs: {e}")
+        log.error("DB error fetching food logs", user_id=user, error=str(e))
         raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
 
 
 # ----------------------
@@ -200,63 +229,81 @@ NORMALIZED_NUTRIENT_CODES = [
 ]
 
 
-def insert_food_entry_nutrients_normalized(nutrient_data_list):
+def build_food_entry_nutrient_rows(nutrient_data_list, code_map):
+    """Unpivot wide nutrient dicts into (user_id, food_entry_id, date, nutrient_id, amount) rows.
+
+    Later duplicates of the same (food_entry_id, nutrient_id) win, since one upsert statement
+    cannot touch the same row twice.
+    """
+    rows = {}
+    for item in nutrient_data_list:
+        food_entry_id = item.get('food_entry_id')
+        date = item.get('date')
+        user_id = item.get('user_id')
+        if not food_entry_id or not date or not user_id:
+            # skip malformed
+            continue
+        for code in NORMALIZED_NUTRIENT_CODES:
+            value = item.get(code)
+            if value is None:
+                continue
+            nutrient_id = code_map.get(code)
+            if nutrient_id is None:
+                continue
+            rows[(food_entry_id, nutrient_id)] = (user_id, food_entry_id, date, nutrient_id, float(value))
+    return list(rows.values())
+
+
+def insert_food_entry_nutrients_normalized(nutrient_data_list, page_size=NUTRIENT_WRITE_PAGE_SIZE):
     """Accepts list of dicts in the current wide format and writes rows into personal_data.food_entry_nutrients.
 
     Expected input keys per dict: food_entry_id, date, user_id, plus any of NORMALIZED_NUTRIENT_CODES.
+    The whole list is written over one connection and one commit, `page_size` rows per statement.
     """
     if not nutrient_data_list:
-        print("⚠️ No nutrient data to insert.")
+        log.info("No nutrient data to insert")
         return
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        code_map = _get_nutrient_code_map(cursor)
-
-        rows = []
-        for item in nutrient_data_list:
-            food_entry_id = item.get('food_entry_id')
-            date = item.get('date')
-            user_id = item.get('user_id')
-            if not food_entry_id or not date or not user_id:
-                # skip malformed
-                continue
-            for code in NORMALIZED_NUTRIENT_CODES:
-                value = item.get(code)
-                if value is None:
-                    continue
-                nutrient_id = code_map.get(code)
-                if nutrient_id is None:
-                    continue
-                rows.append((user_id, food_entry_id, date, nutrient_id, float(value)))
-
-        if not rows:
-            print("⚠️ No normalized rows to insert.")
-            return
-
-        sql = """
-            INSERT INTO personal_data.food_entry_nutrients (user_id, food_entry_id, date, nutrient_id, amount)
-            VALUES %s
-            ON CONFLICT (food_entry_id, nutrient_id) DO UPDATE SET amount = EXCLUDED.amount
-        """
-
-        execute_values(cursor, sql, rows)
-        conn.commit()
-        print(f"✅ Inserted/updated {len(rows)} food_entry_nutrient rows.")
+        with get_connection() as conn, conn.cursor() as cursor:
+            code_map = _get_nutrient_code_map(cursor)
+            rows = build_food_entry_nutrient_rows(nutrient_data_list, code_map)
+
+            if not rows:
+                log.info("No normalized rows to insert")
+                return
+
+            user_dates = defaultdict(set)
+            for user_id, _, date, _, _ in rows:
+                user_dates[user_id].add(str(date))
+
+            dates = sorted({d for ds in user_dates.values() for d in ds})
+            _create_monthly_partitions(cursor, "food_entry_nutrients", dates[0], dates[-1])
+
+            # Rows of entries moved to another day are removed by the food_entries date trigger
+            # (partition_nutrient_facts migration), so this upsert only touches the rows' own partitions
+            sql = """
+                INSERT INTO personal_data.food_entry_nutrients (user_id, food_entry_id, date, nutrient_id, amount)
+                VALUES %s
+                ON CONFLICT (food_entry_id, nutrient_id, date) DO UPDATE SET
+                    amount = EXCLUDED.amount,
+                    enriched_at = NOW()
+            """
+
+            execute_values(cursor, sql, rows, page_size=page_size)
+            refreshed = _refresh_daily_nutrient_rollup(cursor, user_dates)
+
+            conn.commit()
+            log.info("Upserted food_entry_nutrients", rows=len(rows), rollup_rows=refreshed)
     except Exception as e:
-        print(f"❌ DB error inserting normalized nutrient data: {e}")
+        log.error("DB error inserting normalized nutrient data", error=str(e))
         raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
 
 
 def insert_daily_nutrient_goals_normalized(goals_data_list):
     """Accepts list of dicts with wide goal keys and writes to personal_data.daily_nutrient_goals."""
     if not goals_data_list:
-        print("⚠️ No goals data to insert.")
+        log.info("No goals data to insert")
         return
 
     goal_key_to_code = {
@@ -290,41 +337,189 @@ def insert_daily_nutrient_goals_normalized(goals_data_list):
     }
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            code_map = _get_nutrient_code_map(cursor)
+
+            rows = []
+            for goals in goals_data_list:
+                user_id = goals.get('user_id')
+                date = goals.get('date')
+                if not user_id or not date:
+                    continue
+                for goal_key, code in goal_key_to_code.items():
+                    val = goals.get(goal_key)
+                    if val is None:
+                        continue
+                    nutrient_id = code_map.get(code)
+                    if nutrient_id is None:
+                        continue
+                    rows.append((user_id, date, nutrient_id, float(val)))
+
+            if not rows:
+                log.info("No normalized goals rows to insert")
+                return
+
+            sql = """
+                INSERT INTO personal_data.daily_nutrient_goals (user_id, date, nutrient_id, goal_amount)
+                VALUES %s
+                ON CONFLICT (user_id, date, nutrient_id) DO UPDATE SET goal_amount = EXCLUDED.goal_amount
+            """
+            execute_values(cursor, sql, rows)
+
+            # A goal applies from its date onwards, so only later rollup days need their RDA recomputed
+            first_goal_dates = {}
+            for user_id, date, _, _ in rows:
+                first_goal_dates[user_id] = min(date, first_goal_dates.get(user_id, date))
+            refreshed = 0
+            for user_id, since in first_goal_dates.items():
+                cursor.execute("""
+                    SELECT personal_data.refresh_daily_nutrient_rollup(%s, ARRAY(
+                        SELECT DISTINCT date FROM personal_data.daily_nutrient_rollup
+                        WHERE user_id = %s AND date >= %s::date
+                    ))
+                """, (user_id, user_id, since))
+                refreshed += cursor.fetchone()[0]
+
+            conn.commit()
+            log.info("Upserted daily_nutrient_goals", rows=len(rows), rollup_rows=refreshed)
+    except Exception as e:
+        log.error("DB error inserting normalized daily goals", error=str(e))
+        raise ValueError({str(e)})
 
-        code_map = _get_nutrient_code_map(cursor)
 
-        rows = []
-        for goals in goals_data_list:
-            user_id = goals.get('user_id')
-            date = goals.get('date')
-            if not user_id or not date:
-                continue
-            for goal_key, code in goal_key_to_code.items():
-                val = goals.get(goal_key)
-                if val is None:
-                    continue
-                nutrient_id = code_map.get(code)
-                if nutrient_id is None:
-                    continue
-                rows.append((user_id, date, nutrient_id, float(val)))
-
-        if not rows:
-            print("⚠️ No normalized goals rows to insert.")
-            return
-
-        sql = """
-            INSERT INTO personal_data.daily_nutrient_goals (user_id, date, nutrient_id, goal_amount)
-            VALUES %s
-            ON CONFLICT (user_id, date, nutrient_id) DO UPDATE SET goal_amount = EXCLUDED.goal_amount
-        """
-        execute_values(cursor, sql, rows)
+# ----------------------
+# Partitions
+# ----------------------
+
+def _create_monthly_partitions(cursor, table, start, end):
+    cursor.execute(
+        "SELECT personal_data.create_monthly_partitions(%s, %s::date, %s::date)",
+        (table, start, end)
+    )
+    return cursor.fetchone()[0]
+
+
+def ensure_nutrient_partitions(months_ahead=NUTRIENT_PARTITION_MONTHS_AHEAD):
+    """Create the monthly partitions of the nutrient fact tables from this month to `months_ahead` months out."""
+    today = datetime.date.today()
+    until = datetime.date(today.year + (today.month - 1 + months_ahead) // 12, (today.month - 1 + months_ahead) % 12 + 1, 1)
+    created = 0
+    with get_connection() as conn, conn.cursor() as cursor:
+        for table in PARTITIONED_NUTRIENT_TABLES:
+            created += _create_monthly_partitions(cursor, table, today.replace(day=1), until)
         conn.commit()
-        print(f"✅ Inserted/updated {len(rows)} daily_nutrient_goals rows.")
+    log.info("Nutrient partitions ready", until=f"{until:%Y-%m}", created=created)
+    return created
+
+
+# ----------------------
+# Daily nutrient rollup
+# ----------------------
+
+def _refresh_daily_nutrient_rollup(cursor, user_dates):
+    """Recompute rollup rows for {user_id: dates} inside the caller's transaction; returns rows written."""
+    refreshed = 0
+    for user_id, dates in user_dates.items():
+        cursor.execute(
+            "SELECT personal_data.refresh_daily_nutrient_rollup(%s, %s::date[])",
+            (user_id, sorted({str(d) for d in dates}))
+        )
+        refreshed += cursor.fetchone()[0]
+    return refreshed
+
+
+def rebuild_daily_nutrient_rollup(user=None, start=None, end=None):
+    """Recompute the rollup from food_entry_nutrients, optionally limited to one user and a date range.
+
+    Each user is committed separately so a long rebuild keeps its progress.
+    """
+    sql = """
+        SELECT user_id, array_agg(DISTINCT date ORDER BY date)
+        FROM (
+            SELECT user_id, date FROM personal_data.food_entry_nutrients
+            UNION
+            SELECT user_id, date FROM personal_data.daily_nutrient_rollup
+        ) d
+        WHERE (%(user)s::int IS NULL OR user_id = %(user)s::int)
+          AND (%(start)s::date IS NULL OR date >= %(start)s::date)
+          AND (%(end)s::date IS NULL OR date <= %(end)s::date)
+        GROUP BY user_id
+    """
+
+    total = 0
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(sql, {"user": user, "start": start, "end": end})
+        for user_id, dates in cursor.fetchall():
+            refreshed = _refresh_daily_nutrient_rollup(cursor, {user_id: dates})
+            conn.commit()
+            log.info("Rebuilt daily nutrient rollup", user_id=user_id, days=len(dates), rollup_rows=refreshed)
+            total += refreshed
+    return total
+
+
+# ----------------------
+# Food nutrient estimate cache
+# ----------------------
+
+def make_food_cache_key(food_name, fatsecret_food_id, unit):
+    """Normalized (food_name, fatsecret_food_id, unit) key used by the estimate cache."""
+    def norm(value):
+        return ' '.join(str(value or '').lower().split())
+
+    return norm(food_name), norm(fatsecret_food_id), norm(unit)
+
+
+def get_cached_nutrient_estimates(cache_keys, cache_version, ttl_days):
+    """Return {cache_key: per-unit nutrient dict} for keys cached under `cache_version` within `ttl_days`."""
+    cache_keys = list(set(cache_keys))
+    if not cache_keys:
+        return {}
+
+    sql = """
+        SELECT c.food_key, c.fatsecret_food_id, c.unit, c.nutrients_per_unit
+        FROM personal_data.food_nutrient_estimate_cache c
+        JOIN (VALUES %%s) AS k (food_key, fatsecret_food_id, unit)
+          ON k.food_key = c.food_key
+         AND k.fatsecret_food_id = c.fatsecret_food_id
+         AND k.unit = c.unit
+        WHERE c.cache_version = %s
+          AND c.updated_at >= NOW() - make_interval(days => %s)
+    """
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            # execute_values only fills the VALUES list; bind the remaining params first
+            sql = cursor.mogrify(sql, (cache_version, ttl_days)).decode()
+            rows = execute_values(cursor, sql, cache_keys, fetch=True)
+            return {(row[0], row[1], row[2]): row[3] for row in rows}
     except Exception as e:
-        print(f"❌ DB error inserting normalized daily goals: {e}")
-        raise ValueError({str(e)})
-    finally:
-        cursor.close()
-        conn.close()
+        log.error("DB error reading nutrient estimate cache", error=str(e))
+        return {}
+
+
+def upsert_cached_nutrient_estimates(per_unit_estimates, cache_version):
+    """Store {cache_key: per-unit nutrient dict} under `cache_version`."""
+    if not per_unit_estimates:
+        return
+
+    rows = [
+        (food_key, fatsecret_food_id, unit, cache_version, Json(nutrients))
+        for (food_key, fatsecret_food_id, unit), nutrients in per_unit_estimates.items()
+    ]
+
+    sql = """
+        INSERT INTO personal_data.food_nutrient_estimate_cache
+            (food_key, fatsecret_food_id, unit, cache_version, nutrients_per_unit)
+        VALUES %s
+        ON CONFLICT (food_key, fatsecret_food_id, unit, cache_version) DO UPDATE SET
+            nutrients_per_unit = EXCLUDED.nutrients_per_unit,
+            updated_at = NOW()
+    """
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, sql, rows, page_size=NUTRIENT_WRITE_PAGE_SIZE)
+            conn.commit()
+            log.info("Cached per-unit nutrient estimates", rows=len(rows))
+    except Exception as e:
+        log.error("DB error writing nutrient estimate cache", error=str(e))
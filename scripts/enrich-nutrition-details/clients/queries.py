@@ -0,0 +1,22 @@
+# fatsecret/queries.py
+# Plain SQL only (no imports), so scripts/fetch-fs-data/check_query_plans.py can load this file and
+# EXPLAIN exactly what the enrichment job runs.
+
+FOOD_LOG_QUERY = """
+    SELECT fe.id AS food_entry_id, fe.food_name, fe.meal_type, fe.date, fe.user_id,
+           fe.calories, fe.quantity, fe.unit, fe.fatsecret_food_id
+    FROM personal_data.food_entries fe
+    WHERE fe.user_id = %(user)s
+    AND fe.date BETWEEN %(start)s AND %(end)s
+"""
+
+# Leaves out entries that already have nutrient rows written after their last change
+UNENRICHED_FILTER = """
+    AND NOT EXISTS (
+        SELECT 1
+        FROM personal_data.food_entry_nutrients fen
+        WHERE fen.food_entry_id = fe.id
+        AND fen.date = fe.date
+        AND fen.enriched_at >= fe.updated_at
+    )
+"""
@@ -0,0 +1,19 @@
+import argparse
+
+from clients import ensure_nutrient_partitions, NUTRIENT_PARTITION_MONTHS_AHEAD
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Create upcoming monthly partitions of the nutrient fact tables.")
+    parser.add_argument('--months-ahead', type=int, default=NUTRIENT_PARTITION_MONTHS_AHEAD,
+                        help='How many months past the current one should already have partitions')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    ensure_nutrient_partitions(args.months_ahead)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import argparse
+
+from clients import rebuild_daily_nutrient_rollup, get_logger
+
+log = get_logger("enrich.rebuild_rollup")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild personal_data.daily_nutrient_rollup from food_entry_nutrients.")
+    parser.add_argument('--user', type=int, help='Only rebuild this user id')
+    parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
+    parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with log.timed("rebuild daily nutrient rollup", user_id=args.user, start=args.start, end=args.end):
+        total = rebuild_daily_nutrient_rollup(user=args.user, start=args.start, end=args.end)
+    log.info("Rollup rebuild complete", rows=total)
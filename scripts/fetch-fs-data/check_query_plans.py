@@ -0,0 +1,148 @@
+"""EXPLAIN the hot dashboard/enrichment queries and fail if any of them needs a sequential scan.
+
+Sequential scans are disabled for the session, so the planner only picks one when no index can
+serve the query; a small table that would be seq-scanned anyway does not cause false alarms.
+Exits with status 1 when a watched table is seq-scanned.
+"""
+from datetime import date, timedelta
+import argparse
+import importlib.util
+import os
+import re
+import sys
+
+from clients import get_connection, get_logger
+
+log = get_logger("fetch.check_query_plans")
+
+# The enrichment job's SQL lives in its own clients package; load the plain-SQL module by path so the
+# plan checked here is the query that job actually runs
+ENRICH_QUERIES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "enrich-nutrition-details", "clients", "queries.py"
+)
+_spec = importlib.util.spec_from_file_location("enrich_queries", ENRICH_QUERIES_PATH)
+enrich_queries = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(enrich_queries)
+
+# Tables that must always be reached through an index
+WATCHED_TABLES = {
+    "food_entries",
+    "exercise_entries",
+    "weights",
+    "date_exclusions",
+    "food_entry_nutrients",
+    "estimated_food_nutrients",
+    "estimated_food_nutrients_v2",
+    "daily_nutrient_rollup",
+    "daily_nutrient_goals",
+}
+
+NOT_EXCLUDED = """
+    NOT EXISTS (
+        SELECT 1 FROM personal_data.date_exclusions de
+        WHERE de.user_id = %(user)s AND de.date = {alias}.date
+    )
+"""
+
+HOT_QUERIES = {
+    "food log to enrich (get_food_log_entries_by_date)": enrich_queries.FOOD_LOG_QUERY + enrich_queries.UNENRICHED_FILTER,
+    "daily view: calories per meal": f"""
+        SELECT meal_type, SUM(calories)
+        FROM personal_data.food_entries f
+        WHERE f.user_id = %(user)s AND f.date = %(end)s
+        AND {NOT_EXCLUDED.format(alias="f")}
+        GROUP BY meal_type
+    """,
+    "stats: calories consumed per day": f"""
+        SELECT f.date, SUM(calories)
+        FROM personal_data.food_entries f
+        WHERE f.user_id = %(user)s AND f.date BETWEEN %(start)s AND %(end)s
+        AND {NOT_EXCLUDED.format(alias="f")}
+        GROUP BY f.date
+    """,
+    "stats: calories burned per day": f"""
+        SELECT e.date, SUM(calories)
+        FROM personal_data.exercise_entries e
+        WHERE e.user_id = %(user)s AND e.date BETWEEN %(start)s AND %(end)s
+        AND {NOT_EXCLUDED.format(alias="e")}
+        GROUP BY e.date
+    """,
+    "stats: weight": f"""
+        SELECT w.date, w.weight_kg
+        FROM personal_data.weights w
+        WHERE w.user_id = %(user)s AND w.date BETWEEN %(start)s AND %(end)s
+        AND {NOT_EXCLUDED.format(alias="w")}
+    """,
+    "nutrients: daily summary (rollup)": """
+        SELECT date, nutrient_name, intake_value, rda_value, percent_of_rda, comment
+        FROM personal_data.daily_micronutrient_summary_v2
+        WHERE user_id = %(user)s AND date BETWEEN %(start)s AND %(end)s
+    """,
+    "nutrients: per-day intake": """
+        SELECT fen.date, fen.nutrient_id, SUM(fen.amount)
+        FROM personal_data.food_entry_nutrients fen
+        WHERE fen.user_id = %(user)s AND fen.date BETWEEN %(start)s AND %(end)s
+        GROUP BY fen.date, fen.nutrient_id
+    """,
+    "nutrients: legacy v2 estimates": """
+        SELECT efn.date, efn.nutrient_id, SUM(efn.amount)
+        FROM personal_data.estimated_food_nutrients_v2 efn
+        WHERE efn.user_id = %(user)s AND efn.date BETWEEN %(start)s AND %(end)s
+        GROUP BY efn.date, efn.nutrient_id
+    """,
+}
+
+
+# Monthly partitions (<table>_YYYY_MM) count as their parent table
+PARTITION_SUFFIX = re.compile(r"_\d{4}_\d{2}$")
+
+
+def seq_scanned_tables(plan):
+    """Watched relations (or their partitions) that appear under a Seq Scan node anywhere in the plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        table = PARTITION_SUFFIX.sub("", plan.get("Relation Name", ""))
+        if table in WATCHED_TABLES:
+            found.append(table)
+    for child in plan.get("Plans", []):
+        found.extend(seq_scanned_tables(child))
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fail when a hot query falls back to a sequential scan.")
+    parser.add_argument('--user', type=int, default=1, help='User id to plan the queries for')
+    parser.add_argument('--days', type=int, default=30, help='Size of the date range used by range queries')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    params = {
+        "user": args.user,
+        "start": date.today() - timedelta(days=args.days),
+        "end": date.today(),
+    }
+
+    failures = 0
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, query in HOT_QUERIES.items():
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+            plan = cursor.fetchone()[0][0]["Plan"]
+            if args.verbose:
+                log.info("Query plan", query=name, plan=plan)
+
+            tables = seq_scanned_tables(plan)
+            if tables:
+                failures += 1
+                log.error("Sequential scan", query=name, tables=sorted(set(tables)))
+            else:
+                log.info("Index-backed", query=name)
+        conn.rollback()
+
+    if failures:
+        log.error("Hot queries need a sequential scan", failures=failures, queries=len(HOT_QUERIES))
+        sys.exit(1)
+    log.info("All hot queries are index-backed", queries=len(HOT_QUERIES))
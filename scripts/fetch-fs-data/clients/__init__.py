@@ -1,6 +1,44 @@
 # fatsecret/__init__.py
-from .fatsecret_client import make_oauth_request
-from .pg_client import insert_values
-from .pg_client import get_all_users
+from .fatsecret_client import make_oauth_request, FatSecretClient, get_fatsecret_client, call_fatsecret
+from .pg_client import insert_values, upsert_values, copy_merge_values, FETCH_BULK_LOAD
+from .pg_client import get_all_users, get_daily_totals
+from .pg_client import get_connection, close_pool
+from .pg_client import get_completed_dates, save_checkpoints
+from .rate_limiter import TokenBucket, AdaptiveRateLimiter, fatsecret_limiter
+from .row_buffer import RowBuffer, FETCH_FLUSH_ROWS
+from .checkpoints import add_checkpoint_args, get_skip_dates, make_checkpoint, checkpoint_date
+from .log import get_logger, configure_logging, StructuredLogger
+from .month_summary import changed_days, fetch_month_totals, MONTH_SUMMARIES, FETCH_SUMMARY_TOLERANCE
 
-__all__ = ["make_oauth_request", "insert_values", "get_all_users"]
+__all__ = [
+    "make_oauth_request",
+    "FatSecretClient",
+    "get_fatsecret_client",
+    "call_fatsecret",
+    "insert_values",
+    "upsert_values",
+    "copy_merge_values",
+    "FETCH_BULK_LOAD",
+    "get_all_users",
+    "get_daily_totals",
+    "get_connection",
+    "close_pool",
+    "get_completed_dates",
+    "save_checkpoints",
+    "TokenBucket",
+    "AdaptiveRateLimiter",
+    "fatsecret_limiter",
+    "RowBuffer",
+    "FETCH_FLUSH_ROWS",
+    "add_checkpoint_args",
+    "get_skip_dates",
+    "make_checkpoint",
+    "checkpoint_date",
+    "get_logger",
+    "configure_logging",
+    "StructuredLogger",
+    "changed_days",
+    "fetch_month_totals",
+    "MONTH_SUMMARIES",
+    "FETCH_SUMMARY_TOLERANCE",
+]
@@ -0,0 +1,42 @@
+# fatsecret/checkpoints.py
+
+from .pg_client import get_completed_dates
+from .log import get_logger
+
+log = get_logger("fetch.checkpoints")
+
+
+def add_checkpoint_args(parser):
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip days that already have a completed checkpoint')
+    parser.add_argument('--refetch-older-than', type=int, metavar='DAYS',
+                        help='Skip completed days that were fetched at least DAYS days after they ended')
+
+
+def checkpoint_date(day, monthly=False):
+    """Date a checkpoint is stored under: the day itself, or the first of the month for monthly methods."""
+    return (day.replace(day=1) if monthly else day).date()
+
+
+def get_skip_dates(args, user_id, method, start_date, end_date, monthly=False):
+    """Checkpoint dates the fetcher can skip for this user/method under the --resume / --refetch-older-than policy.
+
+    Compare them against checkpoint_date(day, monthly).
+    """
+    if args.resume:
+        final_after_days = None
+    elif args.refetch_older_than is not None:
+        final_after_days = args.refetch_older_than
+    else:
+        return set()
+
+    skip_dates = get_completed_dates(user_id, method, checkpoint_date(start_date, monthly), end_date.date(),
+                                     final_after_days, "1 month" if monthly else "1 day")
+    if skip_dates:
+        log.info("Skipping already fetched days", method=method, user_id=user_id, days=len(skip_dates))
+    return skip_dates
+
+
+def make_checkpoint(user_id, method, day, entries, monthly=False):
+    """Checkpoint row for a fetched day; `entries` is None when the fetch gave up."""
+    return user_id, method, checkpoint_date(day, monthly), 'done' if entries is not None else 'failed'
@@ -5,8 +5,13 @@ import hmac
 import base64
 import hashlib
 import urllib.parse
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from .rate_limiter import fatsecret_limiter
+from .log import get_logger
 
 load_dotenv()
 
@@ -14,7 +19,18 @@ CONSUMER_KEY = os.getenv("CONSUMER_KEY")
 CONSUMER_SECRET = os.getenv("CONSUMER_SECRET")
 ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 ACCESS_SECRET = os.getenv("ACCESS_SECRET")
-API_URL = "https://platform.fatsecret.com/rest/server.api"
+# Point at a local stand-in (benchmarks/fatsecret_stub.py) to exercise the fetchers offline
+API_URL = os.getenv("FATSECRET_API_URL", "https://platform.fatsecret.com/rest/server.api")
+
+FATSECRET_POOL_SIZE = int(os.getenv("FATSECRET_POOL_SIZE", 10))
+FATSECRET_CONNECT_TIMEOUT = float(os.getenv("FATSECRET_CONNECT_TIMEOUT", 5))
+FATSECRET_READ_TIMEOUT = float(os.getenv("FATSECRET_READ_TIMEOUT", 30))
+FATSECRET_HTTP_RETRIES = int(os.getenv("FATSECRET_HTTP_RETRIES", 3))
+FATSECRET_MAX_ATTEMPTS = int(os.getenv("FATSECRET_MAX_ATTEMPTS", 6))
+# Attempts for failures that are not throttles; 5xx and connection errors are already retried by the transport
+FATSECRET_ERROR_ATTEMPTS = int(os.getenv("FATSECRET_ERROR_ATTEMPTS", 2))
+
+log = get_logger("fetch.fatsecret")
 
 def percent_encode(val):
     return urllib.parse.quote(str(val), safe='~')
@@ -27,21 +43,126 @@ def generate_oauth_signature(method, base_url, params, consumer_secret, token_se
     hashed = hmac.new(signing_key.encode(), base_string.encode(), hashlib.sha1)
     return base64.b64encode(hashed.digest()).decode()
 
+class FatSecretClient:
+    """Signs FatSecret requests and sends them over one pooled keep-alive session."""
+
+    def __init__(self, pool_size=FATSECRET_POOL_SIZE, connect_timeout=FATSECRET_CONNECT_TIMEOUT,
+                 read_timeout=FATSECRET_READ_TIMEOUT, max_retries=FATSECRET_HTTP_RETRIES, base_url=API_URL):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Transport-level retries only; throttling (HTTP 429, API error 12) is handled by call_fatsecret
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=1,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, access_token, access_token_secret, extra_params, method="GET"):
+        oauth_params = {
+            "oauth_consumer_key": CONSUMER_KEY,
+            "oauth_token": access_token,
+            "oauth_nonce": uuid.uuid4().hex,
+            "oauth_signature_method": "HMAC-SHA1",
+            "oauth_timestamp": str(int(time.time())),
+            "oauth_version": "1.0",
+        }
+
+        all_params = {**extra_params, **oauth_params}
+        signature = generate_oauth_signature(method, self.base_url, all_params, CONSUMER_SECRET, access_token_secret)
+        oauth_params["oauth_signature"] = signature
+        signed_params = {**extra_params, **oauth_params}
+
+        response = self.session.get(self.base_url, params=signed_params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_fatsecret_client(base_url=API_URL):
+    """Return the process-wide client for `base_url` so every fetcher reuses the same connection pool."""
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = _clients[base_url] = FatSecretClient(base_url=base_url)
+    return client
+
+
 def make_oauth_request(access_token, access_token_secret, extra_params, method="GET", base_url=API_URL):
-    oauth_params = {
-        "oauth_consumer_key": CONSUMER_KEY,
-        "oauth_token": access_token,
-        "oauth_nonce": uuid.uuid4().hex,
-        "oauth_signature_method": "HMAC-SHA1",
-        "oauth_timestamp": str(int(time.time())),
-        "oauth_version": "1.0",
-    }
-
-    all_params = {**extra_params, **oauth_params}
-    signature = generate_oauth_signature(method, base_url, all_params, CONSUMER_SECRET, access_token_secret)
-    oauth_params["oauth_signature"] = signature
-    signed_params = {**extra_params, **oauth_params}
-
-    response = requests.get(base_url, params=signed_params)
-    response.raise_for_status()
-    return response.json()
+    client = get_fatsecret_client(base_url)
+    return client.request(access_token, access_token_secret, extra_params, method=method)
+
+
+def _retry_after_seconds(response):
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_fatsecret(access_token, access_token_secret, params, description,
+                   limiter=fatsecret_limiter, max_attempts=FATSECRET_MAX_ATTEMPTS,
+                   error_attempts=FATSECRET_ERROR_ATTEMPTS):
+    """Call a FatSecret method through the shared adaptive limiter, retrying throttles and failures.
+
+    Throttles are retried up to `max_attempts`, other failures up to `error_attempts`; client errors
+    (4xx other than 429, e.g. a revoked token) are not retried. Returns the response JSON, or None on
+    a non-retryable error or once attempts run out.
+    """
+    errors = 0
+    for attempt in range(1, max_attempts + 1):
+        if attempt > 1:
+            limiter.on_retry()
+        limiter.acquire()
+
+        try:
+            data = make_oauth_request(access_token, access_token_secret, params)
+        except Exception as e:
+            status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else None
+            if status == 429:
+                delay = limiter.on_throttle(attempt, _retry_after_seconds(e.response))
+                log.warning("Rate limited (HTTP 429), backing off", request=description, attempt=attempt, delay_s=round(delay, 1))
+                continue
+            limiter.on_error()
+            if status is not None and 400 <= status < 500:
+                log.error("Request rejected", request=description, status=status, error=str(e))
+                return None
+            errors += 1
+            if errors >= error_attempts:
+                log.error("Giving up", request=description, attempts=attempt, error=str(e))
+                return None
+            delay = limiter.backoff_delay(attempt)
+            log.warning("Request failed, retrying", request=description, attempt=attempt, error=str(e), delay_s=round(delay, 1))
+            time.sleep(delay)
+            continue
+
+        if "error" in data:
+            if data["error"].get("code") == 12:
+                delay = limiter.on_throttle(attempt)
+                log.warning("Rate limited (code 12), backing off", request=description, attempt=attempt, delay_s=round(delay, 1))
+                continue
+            limiter.on_error()
+            log.warning("API error", request=description, error=data['error'])
+            return None
+
+        limiter.on_success()
+        log.payload("API response", data, request=description)
+        return data
+
+    log.error("Giving up", request=description, attempts=max_attempts)
+    return None
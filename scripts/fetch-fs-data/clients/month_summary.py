@@ -0,0 +1,92 @@
+# fatsecret/month_summary.py
+
+import os
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from .fatsecret_client import call_fatsecret
+from .pg_client import get_daily_totals
+from .log import get_logger
+
+load_dotenv()
+
+# Largest per-field difference between FatSecret's day total and our stored sum that still counts as equal
+FETCH_SUMMARY_TOLERANCE = float(os.getenv("FETCH_SUMMARY_TOLERANCE", 1.0))
+
+log = get_logger("fetch.month_summary")
+
+# Per-day detail method -> (month summary method, table, summary field -> table column)
+MONTH_SUMMARIES = {
+    "food_entries.get": ("food_entries.get_month", "food_entries", {
+        "calories": "calories",
+        "carbohydrate": "carbohydrate",
+        "protein": "protein",
+        "fat": "fat",
+    }),
+    "exercise_entries.get": ("exercise_entries.get_month", "exercise_entries", {
+        "calories": "calories",
+    }),
+}
+
+
+def fetch_month_totals(user, summary_method, fields, month_day):
+    """{date: {field: total}} for the month containing `month_day`, or None when the call failed."""
+    date_int = (month_day - datetime(1970, 1, 1).replace(tzinfo=timezone.utc)).days
+    params = {
+        "method": summary_method,
+        "format": "json",
+        "date": str(date_int)
+    }
+
+    data = call_fatsecret(user['access_token'], user['access_token_secret'], params,
+                          f"{summary_method} {month_day.strftime('%Y-%m')}")
+    if data is None:
+        return None
+
+    days = (data.get("month") or {}).get("day", [])
+    if not isinstance(days, list):
+        days = [days]
+    totals = {}
+    for day in days:
+        date = datetime.fromtimestamp(int(day["date_int"]) * 86400, tz=timezone.utc).date()
+        totals[date] = {field: float(day.get(field) or 0) for field in fields}
+    return totals
+
+
+def _differs(remote, local, fields):
+    return any(abs(remote.get(f, 0.0) - local.get(f, 0.0)) > FETCH_SUMMARY_TOLERANCE for f in fields)
+
+
+def changed_days(user, detail_method, days):
+    """Subset of `days` whose FatSecret month-summary totals differ from what is stored for the user.
+
+    One summary call per month replaces a detail call per day; months whose summary or stored totals
+    cannot be read keep all their days, so nothing is silently skipped.
+    """
+    summary_method, table, field_columns = MONTH_SUMMARIES[detail_method]
+    if not days:
+        return []
+
+    columns = list(field_columns.values())
+    stored = get_daily_totals(table, user['id'], columns, days[0].date(), days[-1].date())
+    if stored is None:
+        return list(days)
+
+    months = {}
+    for day in days:
+        months.setdefault((day.year, day.month), []).append(day)
+
+    changed = []
+    for month_days in months.values():
+        remote = fetch_month_totals(user, summary_method, field_columns, month_days[0])
+        if remote is None:
+            changed.extend(month_days)
+            continue
+        for day in month_days:
+            local = stored.get(day.date(), {})
+            local = {field: local.get(column, 0.0) for field, column in field_columns.items()}
+            if _differs(remote.get(day.date(), {}), local, field_columns):
+                changed.append(day)
+
+    log.info("Planned changed days from month summaries", method=detail_method, user_id=user['id'],
+             changed_days=len(changed), days=len(days), summary_calls=len(months))
+    return changed
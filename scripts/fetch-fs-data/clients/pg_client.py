@@ -1,9 +1,16 @@
 # fatsecret/pg_client.py
 
 import os
-import psycopg2
+import io
+import csv
+import threading
+import time
+from contextlib import contextmanager
+from psycopg2 import sql as pgsql
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import execute_values, RealDictCursor
 from dotenv import load_dotenv
+from .log import get_logger
 
 load_dotenv()
 
@@ -12,49 +19,281 @@ PG_PORT = os.getenv("PG_PORT", 5432)
 PG_USER = os.getenv("PG_USER")
 PG_PASSWORD = os.getenv("PG_PASSWORD")
 PG_DB = os.getenv("PG_DB")
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", 1))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", 5))
+FETCH_BULK_LOAD = os.getenv("FETCH_BULK_LOAD", "false").lower() in ("1", "true", "yes")
 
+COPY_NULL = "\\N"
 
+log = get_logger("fetch.pg_client")
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when exhausted; the semaphore makes callers wait
+_pool_slots = threading.BoundedSemaphore(PG_POOL_MAX)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    PG_POOL_MIN,
+                    PG_POOL_MAX,
+                    host=PG_HOST,
+                    port=PG_PORT,
+                    user=PG_USER,
+                    password=PG_PASSWORD,
+                    dbname=PG_DB
+                )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
 def get_connection():
-    return psycopg2.connect(
-        host=PG_HOST,
-        port=PG_PORT,
-        user=PG_USER,
-        password=PG_PASSWORD,
-        dbname=PG_DB
-    )
+    """Borrow a pooled connection; rolls back on error and always returns it to the pool."""
+    with _pool_slots:
+        pool = get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
 
 
 def get_all_users():
     try:
-        conn = get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
-            SELECT u.id, u.fatsecret_user_id, t.access_token, t.access_token_secret
-            FROM personal_data.users u
-            JOIN personal_data.access_tokens t ON u.id = t.user_id
-        """)
-        users = cursor.fetchall()
-        return users
+        with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT u.id, u.fatsecret_user_id, t.access_token, t.access_token_secret
+                FROM personal_data.users u
+                JOIN personal_data.access_tokens t ON u.id = t.user_id
+            """)
+            users = cursor.fetchall()
+            return users
     except Exception as e:
-        print(f"❌ DB error getting users: {e}")
+        log.error("DB error getting users", error=str(e))
         return []
-    finally:
-        cursor.close()
-        conn.close()
+
+
+def get_daily_totals(table, user_id, columns, start_date, end_date):
+    """{date: {column: SUM(column)}} of a user's rows in personal_data.`table`, or None on error."""
+    sums = pgsql.SQL(", ").join(
+        pgsql.SQL("COALESCE(SUM({c}), 0)").format(c=pgsql.Identifier(c)) for c in columns
+    )
+    query = pgsql.SQL("""
+        SELECT date, {sums}
+        FROM {table}
+        WHERE user_id = %s AND date BETWEEN %s AND %s
+        GROUP BY date
+    """).format(sums=sums, table=pgsql.Identifier("personal_data", table))
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(query, (user_id, start_date, end_date))
+            return {row[0]: dict(zip(columns, map(float, row[1:]))) for row in cursor.fetchall()}
+    except Exception as e:
+        log.error("DB error reading daily totals", table=table, error=str(e))
+        return None
 
 
 def insert_values(sql, values):
     try:
-        print(f" SQL {sql} ")
-        print(f" Values: {values} ")
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        execute_values(cursor, sql, values)
-        conn.commit()
-        print(f"✅ Inserted {len(values)} rows.")
+        with get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, sql, values)
+            conn.commit()
+        log.info("Inserted rows", rows=len(values))
+        return True
+    except Exception as e:
+        log.error("DB error inserting rows", rows=len(values), error=str(e))
+        return False
+
+
+# ----------------------
+# Upserts and COPY bulk loading
+# ----------------------
+
+def _on_conflict_clause(columns, key_columns, touch_columns=()):
+    """ON CONFLICT ... DO UPDATE for a target aliased `t` that only rewrites rows whose content changed.
+
+    Unchanged rows are left alone (no dead tuple, no WAL, `touch_columns` keep their value) and
+    RETURNING reports whether each written row was inserted or updated.
+    """
+    changed = [c for c in columns if c not in key_columns]
+    updates = [f"{c} = EXCLUDED.{c}" for c in changed]
+    updates += [f"{c} = NOW()" for c in touch_columns]
+    current = ", ".join(f"t.{c}" for c in changed)
+    incoming = ", ".join(f"EXCLUDED.{c}" for c in changed)
+    return (
+        f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(updates)} "
+        f"WHERE ({current}) IS DISTINCT FROM ({incoming}) "
+        f"RETURNING (xmax = 0) AS inserted"
+    )
+
+
+def _upsert_counts(returned, total):
+    """Turn RETURNING (xmax = 0) rows into inserted/updated/unchanged counts for `total` input rows."""
+    inserted = sum(1 for (was_inserted,) in returned if was_inserted)
+    updated = len(returned) - inserted
+    return {"inserted": inserted, "updated": updated, "unchanged": max(total - inserted - updated, 0)}
+
+
+class _CsvRowStream:
+    """Read-only file object rendering rows as CSV on demand, so COPY streams without building one big buffer."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line, lineterminator="\n")
+        self._pending = ""
+        self.rows = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._line.seek(0)
+            self._line.truncate()
+            self._writer.writerow([COPY_NULL if value is None else value for value in row])
+            self._pending += self._line.getvalue()
+            self.rows += 1
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def copy_merge_values(table, columns, key_columns, values, on_conflict):
+    """Stream `values` through COPY FROM STDIN (CSV) into a temp staging table, then merge it with one
+    INSERT ... SELECT ... `on_conflict`. Duplicate keys within the batch keep the last row.
+
+    Returns the rows returned by the merge (see _on_conflict_clause), or None on error.
+    """
+    schema, name = table.split(".")
+    staging = pgsql.Identifier(f"_staging_{name}")
+    cols = pgsql.SQL(", ").join(pgsql.Identifier(c) for c in columns)
+    keys = pgsql.SQL(", ").join(pgsql.Identifier(c) for c in key_columns)
+    target = pgsql.Identifier(schema, name)
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(pgsql.SQL(
+                "CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {cols} FROM {target} WITH NO DATA"
+            ).format(staging=staging, cols=cols, target=target))
+            cursor.execute(pgsql.SQL("ALTER TABLE {staging} ADD COLUMN _row_no BIGSERIAL").format(staging=staging))
+
+            stream = _CsvRowStream(values)
+            cursor.copy_expert(pgsql.SQL(
+                "COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv, NULL {null})"
+            ).format(staging=staging, cols=cols, null=pgsql.Literal(COPY_NULL)).as_string(conn), stream)
+
+            cursor.execute(pgsql.SQL(
+                "INSERT INTO {target} AS t ({cols}) "
+                "SELECT DISTINCT ON ({keys}) {cols} FROM {staging} ORDER BY {keys}, _row_no DESC "
+            ).format(target=target, cols=cols, keys=keys, staging=staging) + pgsql.SQL(on_conflict))
+            returned = cursor.fetchall()
+            conn.commit()
+        log.debug("Copied rows into staging table", table=table, rows=stream.rows)
+        return returned
+    except Exception as e:
+        log.error("DB error bulk loading", table=table, error=str(e))
+        return None
+
+
+def upsert_values(table, columns, key_columns, values, touch_columns=(), bulk=FETCH_BULK_LOAD):
+    """INSERT ... ON CONFLICT (key_columns) DO UPDATE every other column (and NOW() for `touch_columns`),
+    skipping rows that did not change.
+
+    `bulk` switches from multi-row INSERTs to a COPY into a staging table plus one merge.
+    Returns {"inserted", "updated", "unchanged"} counts on success, False on error.
+    """
+    started = time.perf_counter()
+    on_conflict = _on_conflict_clause(columns, key_columns, touch_columns)
+    if bulk:
+        returned = copy_merge_values(table, columns, key_columns, values, on_conflict)
+        if returned is None:
+            return False
+        # Rows sharing a key inside the batch were collapsed before the merge
+        total = len({tuple(row[columns.index(k)] for k in key_columns) for row in values})
+    else:
+        sql = f"INSERT INTO {table} AS t ({', '.join(columns)}) VALUES %s {on_conflict}"
+        try:
+            with get_connection() as conn, conn.cursor() as cursor:
+                returned = execute_values(cursor, sql, values, fetch=True)
+                conn.commit()
+        except Exception as e:
+            log.error("DB error upserting rows", table=table, rows=len(values), error=str(e))
+            return False
+        total = len(values)
+
+    counts = _upsert_counts(returned, total)
+    log.info("Upserted rows", table=table, rows=len(values), bulk=bulk,
+             duration_ms=round((time.perf_counter() - started) * 1000, 1), **counts)
+    return counts
+
+
+# ----------------------
+# Fetch checkpoints
+# ----------------------
+
+def get_completed_dates(user_id, method, start_date, end_date, final_after_days=None, period="1 day"):
+    """Dates in [start_date, end_date] already fetched for `method`.
+
+    With `final_after_days`, only checkpoints fetched at least that many days after the end of their
+    `period` (the day, or the month for monthly checkpoints; UTC) count, so data fetched while it
+    could still change is fetched again.
+    """
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT date
+                FROM personal_data.fetch_checkpoints
+                WHERE user_id = %s
+                AND method = %s
+                AND status = 'done'
+                AND date BETWEEN %s AND %s
+                AND (%s::int IS NULL
+                     OR fetched_at >= (date + %s::interval + make_interval(days => %s::int)) AT TIME ZONE 'UTC')
+            """, (user_id, method, start_date, end_date, final_after_days, period, final_after_days))
+            return {row[0] for row in cursor.fetchall()}
+    except Exception as e:
+        log.error("DB error reading checkpoints", error=str(e))
+        return set()
+
+
+def save_checkpoints(checkpoints):
+    """Upsert (user_id, method, date, status) checkpoints, stamping fetched_at."""
+    if not checkpoints:
+        return
+
+    sql = """
+        INSERT INTO personal_data.fetch_checkpoints (user_id, method, date, status)
+        VALUES %s
+        ON CONFLICT (user_id, method, date) DO UPDATE SET
+            status = EXCLUDED.status,
+            fetched_at = NOW()
+    """
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            execute_values(cursor, sql, checkpoints)
+            conn.commit()
     except Exception as e:
-        print(f"❌ DB error: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        log.error("DB error saving checkpoints", error=str(e))
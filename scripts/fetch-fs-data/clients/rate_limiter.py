@@ -0,0 +1,168 @@
+# fatsecret/rate_limiter.py
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from .log import get_logger
+
+load_dotenv()
+
+FATSECRET_REQUESTS_PER_SECOND = float(os.getenv("FATSECRET_REQUESTS_PER_SECOND", 2))
+FATSECRET_MIN_REQUESTS_PER_SECOND = float(os.getenv("FATSECRET_MIN_REQUESTS_PER_SECOND", 0.1))
+FATSECRET_MAX_REQUESTS_PER_SECOND = float(os.getenv("FATSECRET_MAX_REQUESTS_PER_SECOND", 10))
+FATSECRET_BURST = int(os.getenv("FATSECRET_BURST", 4))
+FATSECRET_BACKOFF_BASE = float(os.getenv("FATSECRET_BACKOFF_BASE", 1))
+FATSECRET_BACKOFF_CAP = float(os.getenv("FATSECRET_BACKOFF_CAP", 120))
+FATSECRET_RATE_STATE_FILE = os.getenv(
+    "FATSECRET_RATE_STATE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".state", "fatsecret_rate.json")
+)
+
+log = get_logger("fetch.rate_limiter")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _wait_time(self, tokens):
+        """Seconds until `tokens` can be taken; consumes them and returns 0 when available."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0
+        return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            with self._lock:
+                wait = self._wait_time(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket whose rate adapts to throttling (AIMD) and is remembered across runs.
+
+    Every successful request adds `increase` req/s (additive increase); every throttle halves
+    the rate (multiplicative decrease) and pauses all callers for the Retry-After hint or an
+    exponential, jittered backoff. The learned rate and the run's counters are saved to
+    `state_file` on exit and the rate is used as the starting point of the next run.
+    """
+
+    def __init__(self, rate, capacity, min_rate, max_rate, increase=0.01, decrease=0.5,
+                 backoff_base=FATSECRET_BACKOFF_BASE, backoff_cap=FATSECRET_BACKOFF_CAP, state_file=None):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.state_file = state_file
+        self._paused_until = 0.0
+        self._started_at = time.monotonic()
+        self.counters = {"requests": 0, "successes": 0, "throttles": 0, "retries": 0, "errors": 0}
+
+        learned_rate = self._load_rate()
+        super().__init__(learned_rate if learned_rate else rate, capacity)
+
+    def _clamp(self, rate):
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _load_rate(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return self._clamp(float(json.load(f)["rate"]))
+        except Exception as e:
+            log.warning("Ignoring unreadable rate state", state_file=self.state_file, error=str(e))
+            return None
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0:
+                    wait = self._wait_time(tokens)
+                    if wait <= 0:
+                        self.counters["requests"] += 1
+                        return
+            time.sleep(wait)
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with full jitter for the given (1-based) retry attempt."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def on_success(self):
+        with self._lock:
+            self.counters["successes"] += 1
+            self.rate = self._clamp(self.rate + self.increase)
+
+    def on_retry(self):
+        with self._lock:
+            self.counters["retries"] += 1
+
+    def on_error(self):
+        with self._lock:
+            self.counters["errors"] += 1
+
+    def on_throttle(self, attempt, retry_after=None):
+        """Slow down after a throttle and pause every caller; returns the pause in seconds."""
+        delay = retry_after if retry_after is not None else self.backoff_delay(attempt)
+        with self._lock:
+            self.counters["throttles"] += 1
+            self.rate = self._clamp(self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at
+            return {
+                **self.counters,
+                "rate": round(self.rate, 3),
+                "elapsed_s": round(elapsed, 1),
+                "effective_rps": round(self.counters["requests"] / elapsed, 3) if elapsed > 0 else 0.0,
+            }
+
+    def save(self):
+        stats = self.stats()
+        log.info("FatSecret rate limiter stats", **stats)
+        if not self.state_file or not stats["requests"]:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump({"rate": self.rate, "last_run": stats}, f, indent=2)
+        except Exception as e:
+            log.warning("Could not save rate state", state_file=self.state_file, error=str(e))
+
+
+# One limiter per process, shared by every worker that talks to FatSecret
+fatsecret_limiter = AdaptiveRateLimiter(
+    FATSECRET_REQUESTS_PER_SECOND,
+    FATSECRET_BURST,
+    min_rate=FATSECRET_MIN_REQUESTS_PER_SECOND,
+    max_rate=FATSECRET_MAX_REQUESTS_PER_SECOND,
+    state_file=FATSECRET_RATE_STATE_FILE,
+)
+atexit.register(fatsecret_limiter.save)
@@ -0,0 +1,57 @@
+# fatsecret/row_buffer.py
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FETCH_FLUSH_ROWS = int(os.getenv("FETCH_FLUSH_ROWS", 500))
+
+
+class RowBuffer:
+    """Bounded buffer that hands rows to `flush_fn` every `max_rows` rows.
+
+    Used as a context manager so whatever is left is flushed when the fetch loop ends,
+    including when it dies halfway: rows that were fetched are still written.
+    Checkpoints added alongside rows are passed to `on_flush` once their rows are written.
+    `flush_fn` returning False means the write failed: the rows and their checkpoints are dropped,
+    so those days keep no 'done' checkpoint and are fetched again by the next --resume run.
+    When `flush_fn` returns a dict of counts (see upsert_values) they are summed in `counts`.
+    """
+
+    def __init__(self, flush_fn, max_rows=FETCH_FLUSH_ROWS, on_flush=None):
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.on_flush = on_flush
+        self.rows = []
+        self.checkpoints = []
+        self.flushed_rows = 0
+        self.counts = {}
+
+    def add(self, rows, checkpoint=None):
+        self.rows.extend(rows)
+        if checkpoint is not None:
+            self.checkpoints.append(checkpoint)
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        rows, self.rows = self.rows, []
+        checkpoints, self.checkpoints = self.checkpoints, []
+        if rows:
+            result = self.flush_fn(rows)
+            if result is False:
+                return
+            self.flushed_rows += len(rows)
+            if isinstance(result, dict):
+                for key, count in result.items():
+                    self.counts[key] = self.counts.get(key, 0) + count
+        if checkpoints and self.on_flush:
+            self.on_flush(checkpoints)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
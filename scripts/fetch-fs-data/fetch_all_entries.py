@@ -0,0 +1,169 @@
+"""Fetch food, exercise and weight entries for every user in one pass.
+
+Users are read once and every (method, user, day) request goes through one thread pool in one process.
+All methods share the FatSecret limiter, so wall time is still roughly total requests / rate; the pass
+saves the repeated user reads and process start-ups of three separate scripts, and requests each weight
+month once, whatever the date range.
+With --changed-only, food and exercise days are first compared against FatSecret's month summaries
+and only days whose totals differ get a per-day detail call.
+"""
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import argparse
+import os
+
+from clients import (
+    FETCH_BULK_LOAD,
+    get_all_users,
+    RowBuffer,
+    FETCH_FLUSH_ROWS,
+    save_checkpoints,
+    add_checkpoint_args,
+    get_skip_dates,
+    make_checkpoint,
+    checkpoint_date,
+    changed_days,
+    MONTH_SUMMARIES,
+    get_logger,
+)
+from fetch_food_entries import fetch_food_entries_for_date, insert_food_entries, METHOD as FOOD_METHOD
+from fetch_exercise_entries import fetch_exercise_entries_for_date, insert_exercise_entries, METHOD as EXERCISE_METHOD
+from fetch_weight import fetch_weight_entries_for_month, insert_weight_entries, METHOD as WEIGHT_METHOD
+
+FETCH_ALL_WORKERS = int(os.getenv("FETCH_ALL_WORKERS", 3))
+FETCH_CHANGED_ONLY = os.getenv("FETCH_CHANGED_ONLY", "false").lower() in ("1", "true", "yes")
+
+log = get_logger("fetch.all_entries")
+
+FETCHERS = {
+    FOOD_METHOD: fetch_food_entries_for_date,
+    EXERCISE_METHOD: fetch_exercise_entries_for_date,
+    WEIGHT_METHOD: fetch_weight_entries_for_month,
+}
+
+
+def days_between(start_date, end_date):
+    days = []
+    current_date = start_date
+    while current_date <= end_date:
+        days.append(current_date)
+        current_date += timedelta(days=1)
+    return days
+
+
+def weight_months(days):
+    """One request day per calendar month: the first day of the range that falls in it."""
+    months = {}
+    for day in days:
+        months.setdefault((day.year, day.month), day)
+    return list(months.values())
+
+
+def plan_requests(users, start_date, end_date, args):
+    """Return [(method, user, day)] for every request the run needs, after checkpoint skips."""
+    days = days_between(start_date, end_date)
+    plan = []
+    for user in users:
+        for method, method_days in (
+            (FOOD_METHOD, days),
+            (EXERCISE_METHOD, days),
+            (WEIGHT_METHOD, weight_months(days)),
+        ):
+            monthly = method == WEIGHT_METHOD
+            skip_dates = get_skip_dates(args, user['id'], method, start_date, end_date, monthly)
+            method_days = [day for day in method_days if checkpoint_date(day, monthly) not in skip_dates]
+            if args.changed_only and method in MONTH_SUMMARIES:
+                method_days = changed_days(user, method, method_days)
+            plan.extend((method, user, day) for day in method_days)
+    return plan
+
+
+def iter_planned_entries(plan, workers):
+    """Run the planned requests over a thread pool and yield (method, user_id, day, entries) as they complete."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                FETCHERS[method],
+                user['id'],
+                user['access_token'],
+                user['access_token_secret'],
+                day
+            ): (method, user['id'], day)
+            for method, user, day in plan
+        }
+
+        for future in as_completed(futures):
+            method, user_id, day = futures.pop(future)
+            try:
+                entries = future.result()
+            except Exception as e:
+                log.warning("Worker failed", method=method, user_id=user_id, date=day.strftime('%Y-%m-%d'), error=str(e))
+                entries = None
+            yield method, user_id, day, entries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch and insert food, exercise and weight entries in one pass.")
+    parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
+    parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
+    parser.add_argument('--workers', type=int, default=FETCH_ALL_WORKERS,
+                        help='Number of concurrent fetch workers shared by all methods')
+    parser.add_argument('--flush-rows', type=int, default=FETCH_FLUSH_ROWS,
+                        help='Write fetched entries to the database every N rows')
+    parser.add_argument('--bulk', action=argparse.BooleanOptionalAction, default=FETCH_BULK_LOAD,
+                        help='Load each flush with COPY into a staging table and one merge (for large backfills; --no-bulk overrides FETCH_BULK_LOAD)')
+    parser.add_argument('--changed-only', action=argparse.BooleanOptionalAction, default=FETCH_CHANGED_ONLY,
+                        help='Only fetch food/exercise days whose month-summary totals differ from the database '
+                             '(--no-changed-only forces a full re-sync)')
+    add_checkpoint_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log.info("Fetching food, exercise and weight entries for all users")
+
+    # Default to yesterday and today if not provided
+    today = datetime.now().replace(tzinfo=timezone.utc)
+    default_start = today - timedelta(days=1)
+    default_end = today
+
+    # Parse dates or use defaults
+    start = datetime.strptime(args.start, '%Y-%m-%d').replace(tzinfo=timezone.utc) if args.start else default_start
+    end = datetime.strptime(args.end, '%Y-%m-%d').replace(tzinfo=timezone.utc) if args.end else default_end
+
+    # Get all users with their access tokens
+    users = get_all_users()
+
+    if not users:
+        log.error("No users found in the database")
+        exit(1)
+
+    with log.timed("plan requests", users=len(users)):
+        plan = plan_requests(users, start, end, args)
+    log.info("Planned requests", requests=len(plan), users=len(users), workers=args.workers)
+
+    buffers = {
+        FOOD_METHOD: RowBuffer(partial(insert_food_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints),
+        EXERCISE_METHOD: RowBuffer(partial(insert_exercise_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints),
+        WEIGHT_METHOD: RowBuffer(partial(insert_weight_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints),
+    }
+
+    try:
+        with log.timed("fetch entries", requests=len(plan)):
+            for method, user_id, day, entries in iter_planned_entries(plan, args.workers):
+                buffers[method].add(entries or [], checkpoint=make_checkpoint(
+                    user_id, method, day, entries, monthly=method == WEIGHT_METHOD
+                ))
+    finally:
+        # Whatever was fetched is written, even when the run dies halfway
+        for buffer in buffers.values():
+            buffer.flush()
+
+    for method, buffer in buffers.items():
+        log.info("Streamed entries to the database", method=method, rows=buffer.flushed_rows, **buffer.counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,76 @@
 from datetime import datetime, timedelta, timezone
-import time
-from clients import insert_values, get_all_users, make_oauth_request
+from clients import (
+    upsert_values,
+    FETCH_BULK_LOAD,
+    get_all_users,
+    call_fatsecret,
+    RowBuffer,
+    FETCH_FLUSH_ROWS,
+    save_checkpoints,
+    add_checkpoint_args,
+    get_skip_dates,
+    make_checkpoint,
+    get_logger,
+)
 import argparse
+from functools import partial
 
+METHOD = "exercise_entries.get"
+# Column order of the value tuples built by insert_exercise_entries
+EXERCISE_ENTRY_COLUMNS = (
+    "user_id", "date", "exercise_name", "duration_minutes", "calories", "fatsecret_exercise_id",
+)
 
-def get_exercise_entries(user_id, access_token, access_token_secret, start_date, end_date):
-    all_entries = []
+log = get_logger("fetch.exercise_entries")
+
+
+def fetch_exercise_entries_for_date(user_id, access_token, access_token_secret, current_date):
+    date_int = (int(current_date.timestamp()) // 86400)
+    log.debug("Fetching exercise entries", user_id=user_id, date=current_date.strftime('%Y-%m-%d'))
+
+    params = {
+        "method": METHOD,
+        "format": "json",
+        "date": str(date_int)
+    }
+
+    data = call_fatsecret(access_token, access_token_secret, params, current_date.strftime('%Y-%m-%d'))
+    if data is None:
+        return None
+
+    exercise_entries_data = data.get("exercise_entries")
+    if not exercise_entries_data:
+        log.debug("No exercise entries", user_id=user_id, date=current_date.strftime('%Y-%m-%d'))
+        return []
+
+    entries = exercise_entries_data.get("exercise_entry", [])
+    if not isinstance(entries, list):
+        entries = [entries]
+
+    for entry in entries:
+        entry["entry_date"] = current_date.date().isoformat()
+        entry["user_id"] = user_id
+
+    return entries
+
+
+def iter_exercise_entries(user_id, access_token, access_token_secret, start_date, end_date, skip_dates=()):
+    """Yield (user_id, day, entries) per fetched day, so callers can stream them to the database.
+
+    `entries` is None when the day could not be fetched.
+    """
     current_date = start_date
 
     while current_date <= end_date:
-        retries = 0
-        max_retries = 3
-        success = False
-
-        while retries < max_retries and not success:
-            date_int = (int(current_date.timestamp()) // 86400)
-            print(f"🏋️ Fetching exercise entries for user {user_id} on {current_date.strftime('%Y-%m-%d')} (Attempt {retries + 1})...")
-
-            params = {
-                "method": "exercise_entries.get",
-                "format": "json",
-                "date": str(date_int)
-            }
-
-            try:
-                data = make_oauth_request(access_token, access_token_secret, params)
-
-                if "error" in data:
-                    if data["error"].get("code") == 12:
-                        print("⏳ Rate limited. Waiting 30 seconds before retrying...")
-                        time.sleep(30)
-                        retries += 1
-                        continue
-                    else:
-                        print(f"⚠️ API error on {current_date.strftime('%Y-%m-%d')}: {data['error']}")
-                        break
-
-                exercise_entries_data = data.get("exercise_entries")
-                if not exercise_entries_data:
-                    print(f"ℹ️ No exercise entries for {current_date.strftime('%Y-%m-%d')}")
-                    success = True
-                    break
-
-                entries = exercise_entries_data.get("exercise_entry", [])
-                if not isinstance(entries, list):
-                    entries = [entries]
-
-                for entry in entries:
-                    entry["entry_date"] = current_date.date().isoformat()
-                    entry["user_id"] = user_id
-
-                all_entries.extend(entries)
-                success = True
-            except Exception as e:
-                print(f"⚠️ Failed to fetch {current_date.strftime('%Y-%m-%d')}: {e}")
-                retries += 1
-                time.sleep(5)
-
+        if current_date.date() not in skip_dates:
+            # Pacing and backoff come from the shared adaptive limiter in call_fatsecret
+            yield user_id, current_date, fetch_exercise_entries_for_date(user_id, access_token, access_token_secret, current_date)
         current_date += timedelta(days=1)
-        time.sleep(1)  # Respectful delay between calls
 
-    return all_entries
 
-
-def insert_exercise_entries(entries):
+def insert_exercise_entries(entries, bulk=FETCH_BULK_LOAD):
     if not entries:
-        print("⚠️ No exercise entries to insert.")
+        log.info("No exercise entries to insert")
         return
 
     values = []
@@ -80,32 +85,32 @@ def insert_exercise_entries(entries):
                 entry.get("exercise_id"),
             ))
         except Exception as e:
-            print(f"⚠️ Skipping entry due to error: {e}")
-
-    insert_sql = """
-            INSERT INTO personal_data.exercise_entries (
-                user_id, date, exercise_name, duration_minutes, calories, fatsecret_exercise_id
-            ) VALUES %s
-            ON CONFLICT (user_id, date, fatsecret_exercise_id) DO UPDATE SET
-                exercise_name = EXCLUDED.exercise_name,
-                duration_minutes = EXCLUDED.duration_minutes,
-                calories = EXCLUDED.calories;
-    """
+            log.warning("Skipping malformed exercise entry", exercise_id=entry.get('exercise_id'), error=str(e))
 
-    insert_values(insert_sql, values)
+    return upsert_values(
+        "personal_data.exercise_entries",
+        EXERCISE_ENTRY_COLUMNS,
+        ("user_id", "date", "fatsecret_exercise_id"),
+        values,
+        bulk=bulk
+    )
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch and insert exercise entries.")
     parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
-    return parser.parse_args()
+    parser.add_argument('--flush-rows', type=int, default=FETCH_FLUSH_ROWS,
+                        help='Write fetched entries to the database every N rows')
+    parser.add_argument('--bulk', action=argparse.BooleanOptionalAction, default=FETCH_BULK_LOAD,
+                        help='Load each flush with COPY into a staging table and one merge (for large backfills; --no-bulk overrides FETCH_BULK_LOAD)')
+    add_checkpoint_args(parser)
+    return parser.parse_args(argv)
 
 
-if __name__ == "__main__":
-    print("📥 Fetching exercise entries for all users...")
-
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
+    log.info("Fetching exercise entries for all users")
 
     # Default to yesterday and today if not provided
     today = datetime.now().replace(tzinfo=timezone.utc)
@@ -120,17 +125,27 @@ if __name__ == "__main__":
     users = get_all_users()
     
     if not users:
-        print("❌ No users found in the database")
+        log.error("No users found in the database")
         exit(1)
 
-    for user in users:
-        print(f"👤 Processing user {user['id']} ({user['fatsecret_user_id']})")
-        user_entries = get_exercise_entries(
-            user['id'],
-            user['access_token'],
-            user['access_token_secret'],
-            start,
-            end
-        )
-        insert_exercise_entries(user_entries)
-        time.sleep(5)  # Delay between users
\ No newline at end of file
+    with (
+        log.timed("fetch exercise entries"),
+        RowBuffer(partial(insert_exercise_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints) as buffer,
+    ):
+        for user in users:
+            log.info("Processing user", user_id=user['id'], fatsecret_user_id=user['fatsecret_user_id'])
+            for user_id, day, entries in iter_exercise_entries(
+                user['id'],
+                user['access_token'],
+                user['access_token_secret'],
+                start,
+                end,
+                get_skip_dates(args, user['id'], METHOD, start, end)
+            ):
+                buffer.add(entries or [], checkpoint=make_checkpoint(user_id, METHOD, day, entries))
+
+    log.info("Streamed exercise entries to the database", rows=buffer.flushed_rows, **buffer.counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,115 @@
 from datetime import datetime, timedelta, timezone
-import time
-from clients import insert_values, get_all_users, make_oauth_request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from clients import (
+    upsert_values,
+    FETCH_BULK_LOAD,
+    get_all_users,
+    call_fatsecret,
+    RowBuffer,
+    FETCH_FLUSH_ROWS,
+    save_checkpoints,
+    add_checkpoint_args,
+    get_skip_dates,
+    make_checkpoint,
+    get_logger,
+)
 import argparse
+from functools import partial
+import os
+
+METHOD = "food_entries.get"
+# Column order of the value tuples built by insert_food_entries
+FOOD_ENTRY_COLUMNS = (
+    "user_id", "date", "meal_type", "food_name", "calories",
+    "carbohydrate", "protein", "fat", "saturated_fat", "sugar", "fiber",
+    "calcium", "iron", "cholesterol", "sodium", "vitamin_a", "vitamin_c",
+    "monounsaturated_fat", "polyunsaturated_fat",
+    "quantity", "unit", "fatsecret_food_id", "fatsecret_food_entry_id",
+)
+
+log = get_logger("fetch.food_entries")
+
+
+def fetch_food_entries_for_date(user_id, access_token, access_token_secret, current_date):
+    date_int = int(current_date.timestamp()) // 86400
+    log.debug("Fetching food entries", user_id=user_id, date=current_date.strftime('%Y-%m-%d'))
+
+    params = {
+        "method": METHOD,
+        "format": "json",
+        "date": str(date_int)
+    }
+
+    data = call_fatsecret(access_token, access_token_secret, params, current_date.strftime('%Y-%m-%d'))
+    if data is None:
+        return None
+
+    food_entries_data = data.get("food_entries")
+    if not food_entries_data:
+        log.debug("No food entries", user_id=user_id, date=current_date.strftime('%Y-%m-%d'))
+        return []
+
+    entries = food_entries_data.get("food_entry", [])
+    if not isinstance(entries, list):
+        entries = [entries]
+    for entry in entries:
+        entry["user_id"] = user_id
+    return entries
+
 
+def iter_food_entries(user_id, access_token, access_token_secret, start_date, end_date, skip_dates=()):
+    """Yield (user_id, day, entries) per fetched day, so callers can stream them to the database.
 
-def get_food_entries(user_id, access_token, access_token_secret, start_date, end_date):
-    all_entries = []
+    `entries` is None when the day could not be fetched.
+    """
     current_date = start_date
 
     while current_date <= end_date:
-        retries = 0
-        max_retries = 3
-        success = False
+        if current_date.date() not in skip_dates:
+            # Pacing and backoff come from the shared adaptive limiter in call_fatsecret
+            yield user_id, current_date, fetch_food_entries_for_date(user_id, access_token, access_token_secret, current_date)
+        current_date += timedelta(days=1)
 
-        while retries < max_retries and not success:
-            date_int = int(current_date.timestamp()) // 86400
-            print(f"📅 Fetching entries for user {user_id} on {current_date.strftime('%Y-%m-%d')} (Attempt {retries + 1})...")
 
-            params = {
-                "method": "food_entries.get",
-                "format": "json",
-                "date": str(date_int)
-            }
-
-            try:
-                data = make_oauth_request(access_token, access_token_secret, params)
-
-                if "error" in data:
-                    if data["error"].get("code") == 12:
-                        print("⏳ Rate limited. Waiting 30 seconds before retrying...")
-                        time.sleep(30)
-                        retries += 1
-                        continue
-                    else:
-                        print(f"⚠️ API error on {current_date.strftime('%Y-%m-%d')}: {data['error']}")
-                        break
-
-                food_entries_data = data.get("food_entries")
-                if not food_entries_data:
-                    print(f"ℹ️ No food entries for {current_date.strftime('%Y-%m-%d')}")
-                    success = True
-                    break
-
-                entries = food_entries_data.get("food_entry", [])
-                if entries:
-                    if not isinstance(entries, list):
-                        entries = [entries]
-                    for entry in entries:
-                        entry["user_id"] = user_id
-                    all_entries.extend(entries if isinstance(entries, list) else [entries])
-
-                success = True
-            except Exception as e:
-                print(f"⚠️ Failed to fetch {current_date.strftime('%Y-%m-%d')}: {e}")
-                retries += 1
-                time.sleep(5)
+def iter_food_entries_concurrently(users, start_date, end_date, workers, skip_dates_by_user=None):
+    """Fan out per-user/per-day requests over a thread pool, paced by the shared adaptive limiter.
 
+    Yields (user_id, day, entries) as soon as each request completes.
+    """
+    skip_dates_by_user = skip_dates_by_user or {}
+    days = []
+    current_date = start_date
+    while current_date <= end_date:
+        days.append(current_date)
         current_date += timedelta(days=1)
-        time.sleep(1)  # Respectful delay between calls
-
-    return all_entries
 
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_food_entries_for_date,
+                user['id'],
+                user['access_token'],
+                user['access_token_secret'],
+                day
+            ): (user['id'], day)
+            for user in users
+            for day in days
+            if day.date() not in skip_dates_by_user.get(user['id'], ())
+        }
+
+        for future in as_completed(futures):
+            # Drop the finished future so its result can be garbage collected once flushed
+            user_id, day = futures.pop(future)
+            try:
+                entries = future.result()
+            except Exception as e:
+                log.warning("Worker failed", user_id=user_id, date=day.strftime('%Y-%m-%d'), error=str(e))
+                entries = None
+            yield user_id, day, entries
 
-def insert_food_entries(entries):
-    if not entries:
-        print("⚠️ No food entries to insert.")
-        return
 
+def build_food_entry_values(entries):
+    """Row tuples in FOOD_ENTRY_COLUMNS order; malformed entries are skipped."""
     values = []
     for entry in entries:
         try:
@@ -96,55 +139,44 @@ def insert_food_entries(entries):
                 entry.get('food_entry_id')
             ))
         except Exception as e:
-            print(f"⚠️ Skipping entry due to error: {e}")
-
-    insert_sql = """
-        INSERT INTO personal_data.food_entries (
-            user_id, date, meal_type, food_name, calories,
-            carbohydrate, protein, fat, saturated_fat, sugar, fiber,
-            calcium, iron, cholesterol, sodium, vitamin_a, vitamin_c,
-            monounsaturated_fat, polyunsaturated_fat,
-            quantity, unit, fatsecret_food_id, fatsecret_food_entry_id
-        ) VALUES %s
-        ON CONFLICT (fatsecret_food_entry_id) DO UPDATE SET
-            user_id = EXCLUDED.user_id,
-            date = EXCLUDED.date,
-            meal_type = EXCLUDED.meal_type,
-            food_name = EXCLUDED.food_name,
-            calories = EXCLUDED.calories,
-            carbohydrate = EXCLUDED.carbohydrate,
-            protein = EXCLUDED.protein,
-            fat = EXCLUDED.fat,
-            saturated_fat = EXCLUDED.saturated_fat,
-            sugar = EXCLUDED.sugar,
-            fiber = EXCLUDED.fiber,
-            calcium = EXCLUDED.calcium,
-            iron = EXCLUDED.iron,
-            cholesterol = EXCLUDED.cholesterol,
-            sodium = EXCLUDED.sodium,
-            vitamin_a = EXCLUDED.vitamin_a,
-            vitamin_c = EXCLUDED.vitamin_c,
-            monounsaturated_fat = EXCLUDED.monounsaturated_fat,
-            polyunsaturated_fat = EXCLUDED.polyunsaturated_fat,
-            quantity = EXCLUDED.quantity,
-            unit = EXCLUDED.unit,
-            fatsecret_food_id = EXCLUDED.fatsecret_food_id;
-        """
-
-    insert_values(insert_sql, values)
-
-
-def parse_args():
+            log.warning("Skipping malformed food entry", food_entry_id=entry.get('food_entry_id'), error=str(e))
+    return values
+
+
+def insert_food_entries(entries, bulk=FETCH_BULK_LOAD):
+    if not entries:
+        log.info("No food entries to insert")
+        return
+
+    values = build_food_entry_values(entries)
+
+    return upsert_values(
+        "personal_data.food_entries",
+        FOOD_ENTRY_COLUMNS,
+        ("fatsecret_food_entry_id",),
+        values,
+        touch_columns=("updated_at",),
+        bulk=bulk
+    )
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch and insert food entries.")
     parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
-    return parser.parse_args()
-
+    parser.add_argument('--workers', type=int, default=int(os.getenv("FETCH_WORKERS", 1)),
+                        help='Number of concurrent fetch workers (1 keeps the sequential mode)')
+    parser.add_argument('--flush-rows', type=int, default=FETCH_FLUSH_ROWS,
+                        help='Write fetched entries to the database every N rows')
+    parser.add_argument('--bulk', action=argparse.BooleanOptionalAction, default=FETCH_BULK_LOAD,
+                        help='Load each flush with COPY into a staging table and one merge (for large backfills; --no-bulk overrides FETCH_BULK_LOAD)')
+    add_checkpoint_args(parser)
+    return parser.parse_args(argv)
 
-if __name__ == "__main__":
-    print("📥 Fetching food entries for all users...")
 
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
+    log.info("Fetching food entries for all users")
 
     # Default to yesterday and today if not provided
     today = datetime.now().replace(tzinfo=timezone.utc)
@@ -159,18 +191,33 @@ if __name__ == "__main__":
     users = get_all_users()
     
     if not users:
-        print("❌ No users found in the database")
+        log.error("No users found in the database")
         exit(1)
 
-    for user in users:
-        print(f"👤 Processing user {user['id']} ({user['fatsecret_user_id']})")
-        user_entries = get_food_entries(
-            user['id'],
-            user['access_token'],
-            user['access_token_secret'],
-            start,
-            end
-        )
-        insert_food_entries(user_entries)
-        time.sleep(5)  # Delay between users
+    with (
+        log.timed("fetch food entries"),
+        RowBuffer(partial(insert_food_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints) as buffer,
+    ):
+        if args.workers > 1:
+            log.info("Concurrent mode", workers=args.workers)
+            skip_dates_by_user = {user['id']: get_skip_dates(args, user['id'], METHOD, start, end) for user in users}
+            for user_id, day, entries in iter_food_entries_concurrently(users, start, end, args.workers, skip_dates_by_user):
+                buffer.add(entries or [], checkpoint=make_checkpoint(user_id, METHOD, day, entries))
+        else:
+            for user in users:
+                log.info("Processing user", user_id=user['id'], fatsecret_user_id=user['fatsecret_user_id'])
+                for user_id, day, entries in iter_food_entries(
+                    user['id'],
+                    user['access_token'],
+                    user['access_token_secret'],
+                    start,
+                    end,
+                    get_skip_dates(args, user['id'], METHOD, start, end)
+                ):
+                    buffer.add(entries or [], checkpoint=make_checkpoint(user_id, METHOD, day, entries))
+
+    log.info("Streamed food entries to the database", rows=buffer.flushed_rows, **buffer.counts)
+
 
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,100 @@
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
-import time
-from clients import insert_values, get_all_users, make_oauth_request
+from clients import (
+    upsert_values,
+    FETCH_BULK_LOAD,
+    get_all_users,
+    call_fatsecret,
+    RowBuffer,
+    FETCH_FLUSH_ROWS,
+    save_checkpoints,
+    add_checkpoint_args,
+    get_skip_dates,
+    make_checkpoint,
+    checkpoint_date,
+    get_logger,
+)
 import argparse
+from functools import partial
 
+METHOD = "weights.get_month.v2"
+# Column order of the value tuples built by insert_weight_entries
+WEIGHT_COLUMNS = ("user_id", "date", "weight_kg")
 
-def get_weight_entries(user_id, access_token, access_token_secret, start_date, end_date):
-    all_entries = []
+log = get_logger("fetch.weight")
+
+
+def fetch_weight_entries_for_month(user_id, access_token, access_token_secret, current_date):
+    date_int = (current_date - datetime(1970, 1, 1).replace(tzinfo=timezone.utc)).days
+    log.debug("Fetching weight month", user_id=user_id, month=current_date.strftime('%Y-%m'))
+
+    params = {
+        "method": METHOD,
+        "format": "json",
+        "date": str(date_int)
+    }
+
+    data = call_fatsecret(access_token, access_token_secret, params, current_date.strftime('%Y-%m-%d'))
+    if data is None:
+        return None
+
+    days = data.get("month", {}).get("day", [])
+    if not isinstance(days, list):
+        days = [days]
+    entries = []
+    for entry in days:
+        date = datetime.utcfromtimestamp(int(entry["date_int"]) * 86400).strftime("%Y-%m-%d")
+        weight = entry.get("weight_kg")
+        if weight is not None:
+            entries.append((user_id, date, float(weight)))
+
+    return entries
+
+
+def iter_weight_entries(user_id, access_token, access_token_secret, start_date, end_date, skip_dates=()):
+    """Yield (user_id, day, entries) per fetched month, `entries` being (user_id, date, weight_kg) tuples.
+
+    `day` is the date the month was requested for; `entries` is None when the month could not be fetched.
+    `skip_dates` holds month checkpoints (first of the month).
+    """
     current_date = start_date
 
     while current_date <= end_date:
-        retries = 0
-        max_retries = 3
-        success = False
-
-        while retries < max_retries and not success:
-            date_int = (current_date - datetime(1970, 1, 1).replace(tzinfo=timezone.utc)).days
-            print(f"📅 Fetching entries for user {user_id} on {current_date.strftime('%Y-%m-%d')} (Attempt {retries + 1})...")
-
-            params = {
-                "method": "weights.get_month.v2",
-                "format": "json",
-                "date": str(date_int)
-            }
-
-            try:
-                data = make_oauth_request(access_token, access_token_secret, params)
-                print(f"Data {data}")
-
-                if "error" in data:
-                    if data["error"].get("code") == 12:
-                        print("⏳ Rate limited. Waiting 30 seconds before retrying...")
-                        time.sleep(30)
-                        retries += 1
-                        continue
-                    else:
-                        print(f"⚠️ API error on {current_date.strftime('%Y-%m-%d')}: {data['error']}")
-                        break
-
-                days = data.get("month", {}).get("day", [])
-                entries = []
-                for entry in days:
-                    date = datetime.utcfromtimestamp(int(entry["date_int"]) * 86400).strftime("%Y-%m-%d")
-                    weight = entry.get("weight_kg")
-                    if weight is not None:
-                        entries.append((user_id, date, float(weight)))
-
-                if entries:
-                    all_entries.extend(entries if isinstance(entries, list) else [entries])
-
-                success = True
-            except Exception as e:
-                print(f"⚠️ Failed to fetch {current_date.strftime('%Y-%m-%d')}: {e}")
-                retries += 1
-                time.sleep(5)
-
+        if checkpoint_date(current_date, monthly=True) not in skip_dates:
+            # Pacing and backoff come from the shared adaptive limiter in call_fatsecret
+            yield user_id, current_date, fetch_weight_entries_for_month(user_id, access_token, access_token_secret, current_date)
         current_date += relativedelta(months=1)
-        time.sleep(5)  # Respectful delay between calls
 
-    return all_entries
 
-
-def insert_weight_entries(entries):
+def insert_weight_entries(entries, bulk=FETCH_BULK_LOAD):
     if not entries:
-        print("⚠️ No weight entries to insert.")
+        log.info("No weight entries to insert")
         return
 
-    insert_sql = """
-            INSERT INTO personal_data.weights (user_id, date, weight_kg)
-            VALUES %s
-            ON CONFLICT (user_id, date) DO UPDATE
-            SET weight_kg = EXCLUDED.weight_kg;
-        """
-
-    insert_values(insert_sql, entries)
+    return upsert_values(
+        "personal_data.weights",
+        WEIGHT_COLUMNS,
+        ("user_id", "date"),
+        entries,
+        bulk=bulk
+    )
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch and insert food entries.")
     parser.add_argument('--start', type=str, help='Start date in YYYY-MM-DD format')
     parser.add_argument('--end', type=str, help='End date in YYYY-MM-DD format')
-    return parser.parse_args()
+    parser.add_argument('--flush-rows', type=int, default=FETCH_FLUSH_ROWS,
+                        help='Write fetched entries to the database every N rows')
+    parser.add_argument('--bulk', action=argparse.BooleanOptionalAction, default=FETCH_BULK_LOAD,
+                        help='Load each flush with COPY into a staging table and one merge (for large backfills; --no-bulk overrides FETCH_BULK_LOAD)')
+    add_checkpoint_args(parser)
+    return parser.parse_args(argv)
 
 
-if __name__ == "__main__":
-    print("📥 Fetching weight entries for all users...")
-
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
+    log.info("Fetching weight entries for all users")
 
     # Default to yesterday and today if not provided
     today = datetime.now().replace(tzinfo=timezone.utc)
@@ -101,21 +109,27 @@ if __name__ == "__main__":
     users = get_all_users()
     
     if not users:
-        print("❌ No users found in the database")
+        log.error("No users found in the database")
         exit(1)
 
-    all_entries = []
-    for user in users:
-        print(f"👤 Processing user {user['id']} ({user['fatsecret_user_id']})")
-        user_entries = get_weight_entries(
-            user['id'],
-            user['access_token'],
-            user['access_token_secret'],
-            start,
-            end
-        )
-        all_entries.extend(user_entries)
-        time.sleep(5)  # Delay between users
-
-    insert_weight_entries(all_entries)
+    with (
+        log.timed("fetch weight entries"),
+        RowBuffer(partial(insert_weight_entries, bulk=args.bulk), max_rows=args.flush_rows, on_flush=save_checkpoints) as buffer,
+    ):
+        for user in users:
+            log.info("Processing user", user_id=user['id'], fatsecret_user_id=user['fatsecret_user_id'])
+            for user_id, day, entries in iter_weight_entries(
+                user['id'],
+                user['access_token'],
+                user['access_token_secret'],
+                start,
+                end,
+                get_skip_dates(args, user['id'], METHOD, start, end, monthly=True)
+            ):
+                buffer.add(entries or [], checkpoint=make_checkpoint(user_id, METHOD, day, entries, monthly=True))
+
+    log.info("Streamed weight entries to the database", rows=buffer.flushed_rows, **buffer.counts)
 
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# ingestion/__init__.py
+
+from .script_loader import load_script, SCRIPTS_DIR
+from .log import get_logger, configure_logging, StructuredLogger
+from .scheduler import (
+    Job,
+    run_step,
+    run_forever,
+    DAEMON_FETCH_INTERVAL_MINUTES,
+    DAEMON_ENRICH_INTERVAL_MINUTES,
+    DAEMON_PHOTOS_INTERVAL_MINUTES,
+)
+
+__all__ = [
+    "load_script",
+    "SCRIPTS_DIR",
+    "get_logger",
+    "configure_logging",
+    "StructuredLogger",
+    "Job",
+    "run_step",
+    "run_forever",
+    "DAEMON_FETCH_INTERVAL_MINUTES",
+    "DAEMON_ENRICH_INTERVAL_MINUTES",
+    "DAEMON_PHOTOS_INTERVAL_MINUTES",
+]
@@ -0,0 +1,95 @@
+# ingestion/scheduler.py
+
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from .script_loader import load_script
+from .log import get_logger
+
+load_dotenv()
+
+DAEMON_FETCH_INTERVAL_MINUTES = float(os.getenv("DAEMON_FETCH_INTERVAL_MINUTES", 60))
+DAEMON_ENRICH_INTERVAL_MINUTES = float(os.getenv("DAEMON_ENRICH_INTERVAL_MINUTES", 1440))
+DAEMON_PHOTOS_INTERVAL_MINUTES = float(os.getenv("DAEMON_PHOTOS_INTERVAL_MINUTES", 1440))
+
+log = get_logger("ingestion.scheduler")
+
+
+class Job:
+    """A named chain of script steps run every `interval_minutes`; a run never overlaps the previous one.
+
+    Each step is (path relative to scripts/, argv or None) and runs the script's main().
+    """
+
+    def __init__(self, name, interval_minutes, steps):
+        self.name = name
+        self.interval = interval_minutes * 60
+        self.steps = steps
+        self.next_run = time.monotonic()
+        self._running = threading.Lock()
+        self._thread = None
+
+    def load(self):
+        """Import every step up front, so a broken script or missing setting fails at startup."""
+        for path, _ in self.steps:
+            load_script(path)
+
+    def start_if_due(self, now):
+        if now < self.next_run:
+            return
+        self.next_run = now + self.interval
+        if not self._running.acquire(blocking=False):
+            log.warning("Previous run still in progress, skipping this one", job=self.name)
+            return
+        self._thread = threading.Thread(target=self._run, name=f"job-{self.name}")
+        self._thread.start()
+
+    def _run(self):
+        log.info("Run started", job=self.name)
+        try:
+            with log.timed("run", job=self.name):
+                for path, argv in self.steps:
+                    run_step(self.name, path, argv)
+        finally:
+            self._running.release()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+
+def run_step(job_name, path, argv=None):
+    """Run one script's main(); its failure is logged and does not stop the rest of the job."""
+    module = load_script(path)
+    step_log = log.bind(job=job_name, step=path)
+    try:
+        with step_log.timed("step"):
+            if argv is None:
+                module.main()
+            else:
+                module.main(argv)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            step_log.error("Step exited with non-zero status", status=e.code)
+    except Exception:
+        pass  # already logged with its traceback by timed()
+
+
+def run_forever(jobs, stop_event):
+    """Start due jobs until `stop_event` is set, then wait for the running ones to finish."""
+    for job in jobs:
+        job.load()
+        log.info("Scheduled job", job=job.name, interval_minutes=job.interval / 60,
+                 steps=[path for path, _ in job.steps])
+
+    while not stop_event.is_set():
+        now = time.monotonic()
+        for job in jobs:
+            job.start_if_due(now)
+        stop_event.wait(max(0.0, min(job.next_run for job in jobs) - time.monotonic()))
+
+    log.info("Stopping: waiting for running jobs to finish")
+    for job in jobs:
+        job.join()
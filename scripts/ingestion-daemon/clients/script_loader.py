@@ -0,0 +1,56 @@
+# ingestion/script_loader.py
+
+import importlib.util
+import os
+import re
+import sys
+import threading
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def _pop_clients_modules():
+    return {
+        name: sys.modules.pop(name)
+        for name in list(sys.modules)
+        if name == "clients" or name.startswith("clients.")
+    }
+
+
+def load_script(relative_path):
+    """Import a script under scripts/ once and return its module.
+
+    Every script dir ships its own `clients` package, so each script is imported with its own
+    directory first on sys.path and a clean `clients` slot in sys.modules. The script keeps
+    references to the clients modules it imported, so its pools, sessions and caches stay warm
+    for every later run in this process.
+    """
+    path = os.path.join(SCRIPTS_DIR, relative_path)
+    with _load_lock:
+        if path in _loaded:
+            return _loaded[path]
+
+        script_dir = os.path.dirname(path)
+        module_name = "ingest_" + re.sub(r"\W", "_", os.path.splitext(relative_path)[0])
+        saved = _pop_clients_modules()
+        sys.path.insert(0, script_dir)
+        try:
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        finally:
+            sys.path.remove(script_dir)
+            _pop_clients_modules()
+            sys.modules.update(saved)
+
+        if not callable(getattr(module, "main", None)):
+            raise ValueError(f"{relative_path} has no main() to run")
+        _loaded[path] = module
+        return module
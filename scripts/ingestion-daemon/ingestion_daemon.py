@@ -0,0 +1,90 @@
+"""Long-running ingestion service replacing run_hourly.sh / run_daily.sh.
+
+Every script is imported once, so HTTP sessions, DB pools, the FatSecret rate limiter, the
+nutrient code map and the Gemini model stay warm between runs. Dependencies are installed when
+the service is deployed, not on every run.
+"""
+import argparse
+import fcntl
+import os
+import signal
+import sys
+import threading
+
+from clients import (
+    Job,
+    run_step,
+    run_forever,
+    SCRIPTS_DIR,
+    DAEMON_FETCH_INTERVAL_MINUTES,
+    DAEMON_ENRICH_INTERVAL_MINUTES,
+    DAEMON_PHOTOS_INTERVAL_MINUTES,
+    get_logger,
+)
+
+LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state", "ingestion_daemon.lock")
+
+log = get_logger("ingestion.daemon")
+
+
+def build_jobs():
+    return [
+        Job("fetch", DAEMON_FETCH_INTERVAL_MINUTES, [
+            ("enrich-nutrition-details/ensure-nutrient-partitions.py", []),
+            ("fetch-fs-data/fetch_all_entries.py", []),
+        ]),
+        Job("enrich", DAEMON_ENRICH_INTERVAL_MINUTES, [
+            ("enrich-nutrition-details/ai-estimate-nutrition-details.py", []),
+        ]),
+        Job("photos", DAEMON_PHOTOS_INTERVAL_MINUTES, [
+            ("parse-fs-site/parse-journal-photos.py", None),
+        ]),
+    ]
+
+
+def acquire_instance_lock():
+    """Keep a second daemon from running the same jobs; returns the open lock file, or None."""
+    os.makedirs(os.path.dirname(LOCK_FILE), exist_ok=True)
+    lock = open(LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    lock.write(str(os.getpid()))
+    lock.flush()
+    return lock
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the fetch, enrich and photo jobs on their own cadences.")
+    parser.add_argument('--once', choices=['fetch', 'enrich', 'photos'],
+                        help='Run a single job now and exit instead of scheduling')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    lock = acquire_instance_lock()
+    if lock is None:
+        log.error("Another ingestion daemon holds the lock", lock_file=LOCK_FILE)
+        sys.exit(1)
+
+    jobs = build_jobs()
+    log.info("Ingestion daemon started", pid=os.getpid(), scripts_dir=SCRIPTS_DIR)
+
+    if args.once:
+        job = next(job for job in jobs if job.name == args.once)
+        job.load()
+        for path, argv in job.steps:
+            run_step(job.name, path, argv)
+        sys.exit(0)
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    # Returning normally lets atexit hooks (e.g. the learned FatSecret rate) run on SIGTERM too
+    run_forever(jobs, stop_event)
+    log.info("Ingestion daemon stopped")
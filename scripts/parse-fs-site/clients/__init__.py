@@ -1,5 +1,25 @@
 # fatsecret/__init__.py
 
-from .s3_client  import ensure_bucket_exists, upload_to_s3, object_exists
+from .s3_client  import (
+    ensure_bucket_exists,
+    upload_to_s3,
+    upload_stream_with_checksum,
+    get_object_checksum,
+    object_exists,
+    list_existing_keys,
+)
+from .rate_limiter import HostRateLimiter
+from .log import get_logger, configure_logging, StructuredLogger
 
-__all__ = ["ensure_bucket_exists", "upload_to_s3", "object_exists"]
+__all__ = [
+    "ensure_bucket_exists",
+    "upload_to_s3",
+    "upload_stream_with_checksum",
+    "get_object_checksum",
+    "object_exists",
+    "list_existing_keys",
+    "HostRateLimiter",
+    "get_logger",
+    "configure_logging",
+    "StructuredLogger",
+]
@@ -0,0 +1,24 @@
+# fatsecret/rate_limiter.py
+
+import threading
+import time
+import urllib.parse
+
+
+class HostRateLimiter:
+    """Politeness limiter: at most one request every `min_interval` seconds per host, across threads."""
+
+    def __init__(self, min_interval):
+        self.min_interval = float(min_interval)
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Reserve the next free slot for the URL's host and sleep until it comes up."""
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
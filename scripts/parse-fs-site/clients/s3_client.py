@@ -1,9 +1,14 @@
 # fatsecret/s3_client.py
 
 import os
+import hashlib
+import tempfile
+import threading
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from dotenv import load_dotenv
+from .log import get_logger
 
 load_dotenv()
 
@@ -15,19 +20,50 @@ S3_BUCKET = os.getenv("S3_BUCKET", "fatsecret")
 S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
 S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 20))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", 8))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", 8))
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", 4))
+S3_SPOOL_MAX_MB = int(os.getenv("S3_SPOOL_MAX_MB", 16))  # larger downloads spill to a temp file
+
+CHECKSUM_METADATA_KEY = "sha256"
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+log = get_logger("photos.s3_client")
+
+# Multipart above the threshold, with parts uploaded in parallel
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * 1024 * 1024,
+    max_concurrency=S3_UPLOAD_CONCURRENCY,
+    use_threads=True,
+)
 
 # ---------------------------------------------------------------------
 # CLIENT INITIALIZATION
 # ---------------------------------------------------------------------
+_client = None
+_client_lock = threading.Lock()
+
+
 def get_s3_client():
-    return boto3.client(
-        "s3",
-        endpoint_url=S3_ENDPOINT,
-        aws_access_key_id=S3_ACCESS_KEY,
-        aws_secret_access_key=S3_SECRET_KEY,
-        region_name=S3_REGION,
-        config=Config(signature_version="s3v4"),
-    )
+    """Return the process-wide S3 client, creating it on first use (boto3 clients are thread-safe)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = boto3.client(
+                "s3",
+                endpoint_url=S3_ENDPOINT,
+                aws_access_key_id=S3_ACCESS_KEY,
+                aws_secret_access_key=S3_SECRET_KEY,
+                region_name=S3_REGION,
+                config=Config(
+                    signature_version="s3v4",
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    retries={"max_attempts": 5, "mode": "standard"},
+                ),
+            )
+        return _client
 
 
 # ---------------------------------------------------------------------
@@ -38,9 +74,9 @@ def ensure_bucket_exists(bucket_name: str = S3_BUCKET):
     s3 = get_s3_client()
     try:
         s3.head_bucket(Bucket=bucket_name)
-        print(f"✅ Bucket exists: {bucket_name}")
+        log.info("Bucket exists", bucket=bucket_name)
     except Exception:
-        print(f"ℹ️ Creating bucket: {bucket_name}")
+        log.info("Creating bucket", bucket=bucket_name)
         s3.create_bucket(Bucket=bucket_name)
     return s3
 
@@ -52,15 +88,56 @@ def upload_to_s3(file_or_stream, s3_key, bucket_name=S3_BUCKET, extra_args=None)
     s3 = get_s3_client()
     try:
         if isinstance(file_or_stream, str) and os.path.exists(file_or_stream):
-            s3.upload_file(file_or_stream, bucket_name, s3_key, ExtraArgs=extra_args or {})
+            s3.upload_file(file_or_stream, bucket_name, s3_key, ExtraArgs=extra_args or {}, Config=TRANSFER_CONFIG)
         else:
-            s3.upload_fileobj(file_or_stream, bucket_name, s3_key, ExtraArgs=extra_args or {})
+            s3.upload_fileobj(file_or_stream, bucket_name, s3_key, ExtraArgs=extra_args or {}, Config=TRANSFER_CONFIG)
         return True
     except Exception as e:
-        print(f"❌ Failed to upload {s3_key}: {e}")
+        log.error("Failed to upload", key=s3_key, error=str(e))
         return False
 
 
+def get_object_checksum(s3_key: str, bucket_name: str = S3_BUCKET):
+    """Return the sha256 stored in the object's metadata, or None if the object or the hash is missing."""
+    s3 = get_s3_client()
+    try:
+        head = s3.head_object(Bucket=bucket_name, Key=s3_key)
+    except Exception:
+        return None
+    return head.get("Metadata", {}).get(CHECKSUM_METADATA_KEY)
+
+
+def upload_stream_with_checksum(stream, s3_key, bucket_name=S3_BUCKET, extra_args=None, known_missing=False):
+    """
+    Streams a file-like object to S3, hashing it on the way, and stores the sha256 as object metadata.
+
+    The stream is spooled (in memory up to S3_SPOOL_MAX_MB, then on disk) so the source connection is
+    released as soon as it is read and the upload can go out as parallel multipart parts. The upload is
+    skipped when the object already carries the same sha256; pass `known_missing=True` to skip that HEAD.
+    Returns (uploaded, sha256); sha256 is None when the transfer failed.
+    """
+    s3 = get_s3_client()
+    digest = hashlib.sha256()
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=S3_SPOOL_MAX_MB * 1024 * 1024) as spool:
+            for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                spool.write(chunk)
+            checksum = digest.hexdigest()
+
+            if not known_missing and get_object_checksum(s3_key, bucket_name) == checksum:
+                log.debug("Unchanged on S3 (sha256 match)", key=s3_key)
+                return False, checksum
+
+            args = dict(extra_args or {})
+            args["Metadata"] = {**args.get("Metadata", {}), CHECKSUM_METADATA_KEY: checksum}
+            spool.seek(0)
+            s3.upload_fileobj(spool, bucket_name, s3_key, ExtraArgs=args, Config=TRANSFER_CONFIG)
+        return True, checksum
+    except Exception as e:
+        log.error("Failed to upload", key=s3_key, error=str(e))
+        return False, None
+
 
 def object_exists(s3_key: str, bucket_name: str = S3_BUCKET) -> bool:
     """Check if object already exists."""
@@ -70,3 +147,21 @@ def object_exists(s3_key: str, bucket_name: str = S3_BUCKET) -> bool:
         return True
     except Exception:
         return False
+
+
+def list_existing_keys(prefixes, bucket_name: str = S3_BUCKET):
+    """List every key under `prefixes` once (paginated list_objects_v2) and return them as a set.
+
+    Returns None when listing fails, so callers can fall back to `object_exists`.
+    """
+    s3 = get_s3_client()
+    paginator = s3.get_paginator("list_objects_v2")
+    keys = set()
+    try:
+        for prefix in prefixes:
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+                keys.update(obj["Key"] for obj in page.get("Contents", []))
+    except Exception as e:
+        log.warning("Failed to list existing keys", bucket=bucket_name, error=str(e))
+        return None
+    return keys
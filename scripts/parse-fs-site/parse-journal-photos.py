@@ -1,11 +1,12 @@
 import re
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from dateutil import parser as dateparser
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from clients import ensure_bucket_exists, object_exists, upload_to_s3
+from clients import ensure_bucket_exists, upload_stream_with_checksum, list_existing_keys, HostRateLimiter, get_logger
 
 # ---------------------------------------------------------------------
 # CONFIG
@@ -13,9 +14,12 @@ from clients import ensure_bucket_exists, object_exists, upload_to_s3
 member_journal_base = "https://foods.fatsecret.com/Default.aspx"
 member_id = "81731212"
 pages_to_scan = 10
-delay_between_requests = 1.0
+delay_between_requests = 1.0     # minimum gap between two requests to the same host
 DAYS_LIMIT = 5
 
+PAGE_WORKERS = int(os.getenv("JOURNAL_PAGE_WORKERS", 3))          # journal pages fetched ahead
+TRANSFER_WORKERS = int(os.getenv("JOURNAL_TRANSFER_WORKERS", 4))  # concurrent download→upload jobs
+
 S3_REGION = "us-east-1"           # MinIO ignores this, but boto3 needs it
 S3_PREFIX = "uploads"            # optional path prefix inside bucket
 S3_BUCKET = "fatsecret"            # optional path prefix inside bucket
@@ -30,8 +34,9 @@ uuid_regex = re.compile(
     r"/food/([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})"
 )
 
-cutoff = datetime.now() - timedelta(days=DAYS_LIMIT)
-print(f"📅 Downloading only entries newer than {cutoff.date()}")
+suff = "_original.jpg"
+
+log = get_logger("photos.journal")
 
 # ---------------------------------------------------------------------
 # HTTP SESSION
@@ -40,27 +45,34 @@ session = requests.Session()
 session.headers.update(HEADERS)
 if COOKIES:
     session.cookies.update(COOKIES)
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PAGE_WORKERS + TRANSFER_WORKERS)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+
+# Shared by page fetchers and image downloaders, so each host sees at most one request per delay
+host_limiter = HostRateLimiter(delay_between_requests)
+
 
 # ---------------------------------------------------------------------
 # STEP 1: PARSE JOURNAL PAGES AND COLLECT (uuid, post_date)
 # ---------------------------------------------------------------------
-found = {}  # uuid -> post_date
-date_limit_reached = False
-
-for pg in range(0, pages_to_scan):
-    if date_limit_reached:
-        print(f"⚠️ Date limit reached. Won't move further: page {pg} is not loaded")
-        break
-
+def fetch_journal_page(pg):
+    """Return the HTML of journal page `pg`, or None when it could not be loaded."""
     params = {"pa": "memn", "pg": str(pg), "id": member_id}
+    host_limiter.wait(member_journal_base)
     resp = session.get(member_journal_base, params=params, timeout=30)
-    print("Fetched", resp.url, "status", resp.status_code)
+    log.debug("Fetched journal page", page=pg, url=resp.url, status=resp.status_code)
 
     if resp.status_code != 200:
-        print(f"page {pg} returned {resp.status_code} — stopping")
-        break
+        log.warning("Journal page not loaded, stopping", page=pg, status=resp.status_code)
+        return None
+    return resp.text
+
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def parse_journal_page(html, cutoff):
+    """Return ([(uuid, post_date), ...], date_limit_reached) for one journal page."""
+    entries = []
+    soup = BeautifulSoup(html, "html.parser")
 
     # Each <tr> block represents a journal entry
     for tr in soup.find_all("tr"):
@@ -78,49 +90,151 @@ for pg in range(0, pages_to_scan):
             continue
 
         if post_date < cutoff:
-            print(f"⏭️ Skipping {post_date.date()} (older than cutoff)")
-            date_limit_reached = True
-            break
+            log.debug("Skipping post older than cutoff", post_date=post_date.date())
+            return entries, True
 
         for m in uuid_regex.finditer(str(tr)):
-            uuid = m.group(1)
-            found[uuid] = post_date.date().isoformat()
+            entries.append((m.group(1), post_date.date().isoformat()))
 
-    print(f"Page {pg}: found {len(found)} unique uuids so far")
-    time.sleep(delay_between_requests)
+    return entries, False
+
+
+def crawl_journal(page_pool, cutoff, on_entry):
+    """Fetch up to PAGE_WORKERS pages ahead, but consume them in page order so the cutoff still stops the crawl."""
+    in_flight = {}
+    next_page = 0
+
+    def submit_next():
+        nonlocal next_page
+        if next_page < pages_to_scan:
+            in_flight[next_page] = page_pool.submit(fetch_journal_page, next_page)
+            next_page += 1
+
+    for _ in range(PAGE_WORKERS):
+        submit_next()
+
+    found = 0
+    for pg in range(pages_to_scan):
+        try:
+            html = in_flight.pop(pg).result()
+        except Exception as e:
+            log.error("Failed to fetch journal page, stopping", page=pg, error=str(e))
+            html = None
+        if html is None:
+            break
+
+        entries, date_limit_reached = parse_journal_page(html, cutoff)
+        for uuid, post_date_str in entries:
+            if on_entry(uuid, post_date_str):
+                found += 1
+        log.info("Parsed journal page", page=pg, unique_uuids=found)
+
+        if date_limit_reached:
+            if pg + 1 < pages_to_scan:
+                log.info("Date limit reached, not loading further pages", next_page=pg + 1)
+            break
+        submit_next()
+
+    # Pages fetched ahead of the cutoff are dropped
+    for future in in_flight.values():
+        future.cancel()
+    return found
 
-# ---------------------------------------------------------------------
-# STEP 2: ENSURE S3 BUCKET EXISTS
-# ---------------------------------------------------------------------
-ensure_bucket_exists(S3_BUCKET)
 
 # ---------------------------------------------------------------------
 # STEP 3: STREAM IMAGES DIRECTLY TO S3 UNDER post_date PREFIX
 # ---------------------------------------------------------------------
-suff = "_original.jpg"
-uploaded = 0
+def post_date_prefix(post_date_str):
+    return f"{S3_PREFIX}/user_id=1/post_date={post_date_str}/"
+
 
-for uuid, post_date_str in sorted(found.items()):
+def list_existing_images(cutoff):
+    """Index the keys already uploaded for every post_date in the scan window with one listing per prefix.
+
+    Returns (listed post_dates, existing keys); both are empty when listing fails.
+    """
+    post_dates = set()
+    day = cutoff.date()
+    while day <= datetime.now().date():
+        post_dates.add(day.isoformat())
+        day += timedelta(days=1)
+
+    existing_keys = list_existing_keys(post_date_prefix(d) for d in sorted(post_dates))
+    if existing_keys is None:
+        return set(), set()
+    log.info("Listed images already on S3", images=len(existing_keys), post_dates=len(post_dates))
+    return post_dates, existing_keys
+
+
+def transfer_image(uuid, post_date_str, listed_dates, existing_keys):
+    """Download one original image and stream it to S3; returns True when it was uploaded."""
     img_url = f"https://m.ftscrt.com/food/{uuid}{suff}"
-    s3_key = f"{S3_PREFIX}/user_id=1/post_date={post_date_str}/{uuid}{suff}"
+    s3_key = f"{post_date_prefix(post_date_str)}{uuid}{suff}"
 
-    # Skip if already exists
-    if object_exists(s3_key):
-        print(f"🟡 Already exists on S3: {s3_key}")
-        continue
+    # Keys in the pre-listed window are skipped without a download; for other dates the checksum
+    # HEAD in upload_stream_with_checksum decides, so an unchanged image is not uploaded again
+    listed = post_date_str in listed_dates
+    if listed and s3_key in existing_keys:
+        log.debug("Already exists on S3", key=s3_key)
+        return False
 
     try:
+        host_limiter.wait(img_url)
         with session.get(img_url, stream=True, timeout=30) as r:
             if r.status_code == 200:
-                if upload_to_s3(r.raw, s3_key, extra_args={"ContentType": "image/jpeg"}):
-                    print(f"✅ Uploaded {uuid} ({post_date_str}) → {s3_key}")
-                    uploaded += 1
+                r.raw.decode_content = True
+                uploaded, checksum = upload_stream_with_checksum(
+                    r.raw, s3_key, extra_args={"ContentType": "image/jpeg"},
+                    known_missing=listed
+                )
+                if uploaded:
+                    log.info("Uploaded image", uuid=uuid, post_date=post_date_str, key=s3_key, sha256=checksum[:12])
+                    return True
             else:
-                print(f"⚠️ Skipped (status {r.status_code}): {img_url}")
+                log.warning("Skipped image", status=r.status_code, url=img_url)
     except Exception as e:
-        print(f"❌ Error uploading {img_url}: {e}")
-        continue
+        log.error("Error uploading image", url=img_url, error=str(e))
+    return False
+
+
+def main():
+    cutoff = datetime.now() - timedelta(days=DAYS_LIMIT)
+    log.info("Downloading only entries newer than cutoff", cutoff=cutoff.date())
+
+    # -----------------------------------------------------------------
+    # STEP 2: ENSURE S3 BUCKET EXISTS (before any transfer starts)
+    # -----------------------------------------------------------------
+    ensure_bucket_exists(S3_BUCKET)
+    listed_dates, existing_keys = list_existing_images(cutoff)
+
+    seen = set()
+    transfers = []
+
+    with ThreadPoolExecutor(max_workers=TRANSFER_WORKERS) as transfer_pool:
+        def on_entry(uuid, post_date_str):
+            # Images start transferring while later journal pages are still being fetched
+            if uuid in seen:
+                return False
+            seen.add(uuid)
+            transfers.append(transfer_pool.submit(transfer_image, uuid, post_date_str, listed_dates, existing_keys))
+            return True
+
+        with (
+            log.timed("crawl journal", pages=pages_to_scan),
+            ThreadPoolExecutor(max_workers=PAGE_WORKERS) as page_pool,
+        ):
+            crawl_journal(page_pool, cutoff, on_entry)
+
+        uploaded = 0
+        for future in as_completed(transfers):
+            try:
+                if future.result():
+                    uploaded += 1
+            except Exception as e:
+                log.error("Transfer worker failed", error=str(e))
+
+    log.info("Done", uploaded=uploaded, images=len(seen), days=DAYS_LIMIT)
 
-    time.sleep(delay_between_requests)
 
-print(f"\n✅ Done. Uploaded {uploaded}/{len(found)} images (last {DAYS_LIMIT} days).")
+if __name__ == "__main__":
+    main()
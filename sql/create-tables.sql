@@ -107,7 +107,8 @@ CREATE TABLE IF NOT EXISTS personal_data.food_entries (
     unit TEXT,
     fatsecret_food_id TEXT,
     fatsecret_food_entry_id TEXT UNIQUE,
-    created_at TIMESTAMPTZ DEFAULT NOW()
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 
@@ -0,0 +1,195 @@
+-- Materialized daily nutrient rollup, one row per (user, day, nutrient) with RDA percentages precomputed.
+-- Kept up to date by the enrichment writers for the (user, date) pairs they touch, and by a trigger
+-- on date_exclusions. Rebuild with scripts/enrich-nutrition-details/rebuild-daily-nutrient-rollup.py
+-- Safe to run multiple times
+--
+-- daily_micronutrient_summary_v2 changes meaning with this migration; check the Grafana nutrient
+-- panels after running it:
+--   * Days with goals but no logged food no longer appear. The old view's FULL OUTER JOIN returned
+--     them as 'No Intake Logged' rows with intake 0; the rollup only has days with intake.
+--   * Each day is compared with the latest goal set on or before that day. The old view joined
+--     goals on (user_id, nutrient_id) only (its date condition was commented out), so every day was
+--     paired with every goal row of that nutrient, and days repeated once per goal date.
+
+BEGIN;
+
+-- Normalized goals written by ai-estimate-daily-goals.py
+CREATE TABLE IF NOT EXISTS personal_data.daily_nutrient_goals (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES personal_data.users(id),
+    date DATE NOT NULL,
+    nutrient_id INT REFERENCES personal_data.nutrients(id) ON DELETE RESTRICT,
+    goal_amount FLOAT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (user_id, date, nutrient_id)
+);
+
+CREATE TABLE IF NOT EXISTS personal_data.daily_nutrient_rollup (
+    user_id INT NOT NULL REFERENCES personal_data.users(id),
+    date DATE NOT NULL,
+    nutrient_id INT NOT NULL REFERENCES personal_data.nutrients(id) ON DELETE RESTRICT,
+    nutrient_name TEXT NOT NULL,
+    intake_value FLOAT NOT NULL,
+    rda_value FLOAT NOT NULL,
+    percent_of_rda NUMERIC,
+    comment TEXT NOT NULL,
+    refreshed_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, date, nutrient_id)
+);
+
+-- Recompute the rollup rows of one user for the given dates. Days with no intake or that are
+-- excluded end up with no rows; goals are the latest ones set on or before each day.
+CREATE OR REPLACE FUNCTION personal_data.refresh_daily_nutrient_rollup(p_user_id INT, p_dates DATE[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    refreshed INT;
+BEGIN
+    DELETE FROM personal_data.daily_nutrient_rollup
+    WHERE user_id = p_user_id
+      AND date = ANY(p_dates);
+
+    INSERT INTO personal_data.daily_nutrient_rollup (
+        user_id, date, nutrient_id, nutrient_name, intake_value, rda_value, percent_of_rda, comment
+    )
+    WITH
+      intake AS (
+        SELECT fen.user_id, fen.date, fen.nutrient_id, SUM(fen.amount) AS intake_value
+        FROM personal_data.food_entry_nutrients fen
+        WHERE fen.user_id = p_user_id
+          AND fen.date = ANY(p_dates)
+          AND NOT EXISTS (
+            SELECT 1 FROM personal_data.date_exclusions de
+            WHERE de.user_id = fen.user_id AND de.date = fen.date
+          )
+        GROUP BY fen.user_id, fen.date, fen.nutrient_id
+      ),
+      days AS (
+        SELECT DISTINCT user_id, date FROM intake
+      ),
+      goals AS (
+        SELECT d.user_id, d.date, g.nutrient_id, g.goal_amount
+        FROM days d
+        CROSS JOIN LATERAL (
+          SELECT DISTINCT ON (g.nutrient_id) g.nutrient_id, g.goal_amount
+          FROM personal_data.daily_nutrient_goals g
+          WHERE g.user_id = d.user_id
+            AND g.date <= d.date
+          ORDER BY g.nutrient_id, g.date DESC
+        ) g
+      ),
+      combined AS (
+        SELECT
+          COALESCE(i.user_id, g.user_id) AS user_id,
+          COALESCE(i.date, g.date) AS date,
+          COALESCE(i.nutrient_id, g.nutrient_id) AS nutrient_id,
+          i.intake_value,
+          g.goal_amount
+        FROM intake i
+        FULL OUTER JOIN goals g
+          ON g.user_id = i.user_id
+         AND g.date = i.date
+         AND g.nutrient_id = i.nutrient_id
+      )
+    SELECT
+      c.user_id,
+      c.date,
+      c.nutrient_id,
+      n.display_name,
+      COALESCE(c.intake_value, 0),
+      COALESCE(c.goal_amount, 0),
+      CASE
+        WHEN c.goal_amount IS NULL OR c.goal_amount = 0
+        THEN NULL
+        ELSE ROUND(((c.intake_value / c.goal_amount) * 100)::NUMERIC, 2)
+      END,
+      CASE
+        WHEN c.goal_amount IS NULL OR c.goal_amount = 0
+        THEN 'NO DATA'
+        WHEN c.intake_value IS NULL
+        THEN 'No Intake Logged'
+        WHEN (c.intake_value / c.goal_amount) < 0.40
+        THEN 'Low'
+        WHEN (c.intake_value / c.goal_amount) < 0.60
+        THEN 'Fair'
+        WHEN (c.intake_value / c.goal_amount) < 0.80
+        THEN 'Good'
+        WHEN (c.intake_value / c.goal_amount) < 1
+        THEN 'Great'
+        WHEN (c.intake_value / c.goal_amount) >= 1.0 AND (c.intake_value / c.goal_amount) < 1.25
+        THEN 'Excellent'
+        WHEN (c.intake_value / c.goal_amount) >= 1.25
+        THEN 'High'
+        ELSE 'Needs Improvement'
+      END
+    FROM combined c
+    JOIN personal_data.nutrients n ON n.id = c.nutrient_id;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$;
+
+-- Adding or removing an exclusion re-evaluates that day
+CREATE OR REPLACE FUNCTION personal_data.refresh_daily_nutrient_rollup_on_exclusion()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM personal_data.refresh_daily_nutrient_rollup(OLD.user_id, ARRAY[OLD.date]);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM personal_data.refresh_daily_nutrient_rollup(NEW.user_id, ARRAY[NEW.date]);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS date_exclusions_refresh_rollup ON personal_data.date_exclusions;
+CREATE TRIGGER date_exclusions_refresh_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON personal_data.date_exclusions
+    FOR EACH ROW EXECUTE FUNCTION personal_data.refresh_daily_nutrient_rollup_on_exclusion();
+
+-- The rollup only reads the normalized tables the enrichment writes today, so carry over the history
+-- that the previous view read from the v2 tables first. Rows already present win; entries migrated
+-- without a food_entry_id cannot be keyed and are left behind. Backfilled nutrients count as enriched now.
+INSERT INTO personal_data.food_entry_nutrients (user_id, food_entry_id, date, nutrient_id, amount, created_at, enriched_at)
+SELECT DISTINCT ON (food_entry_id, nutrient_id)
+    user_id, food_entry_id, date, nutrient_id, amount, created_at, NOW()
+FROM personal_data.estimated_food_nutrients_v2
+WHERE food_entry_id IS NOT NULL
+ORDER BY food_entry_id, nutrient_id, created_at DESC
+-- No conflict target: the unique key gains `date` once the table is partitioned
+ON CONFLICT DO NOTHING;
+
+INSERT INTO personal_data.daily_nutrient_goals (user_id, date, nutrient_id, goal_amount, created_at)
+SELECT user_id, date, nutrient_id, goal_value, created_at
+FROM personal_data.daily_micronutrient_goals_v2
+ON CONFLICT (user_id, date, nutrient_id) DO NOTHING;
+
+-- Initial fill (full rebuild over the backfilled history)
+SELECT personal_data.refresh_daily_nutrient_rollup(user_id, array_agg(DISTINCT date))
+FROM personal_data.food_entry_nutrients
+GROUP BY user_id;
+
+-- The v2 summary becomes a thin read over the rollup: a date-range filter is a primary-key range scan
+CREATE OR REPLACE VIEW personal_data.daily_micronutrient_summary_v2 AS
+SELECT
+  r.user_id,
+  r.date,
+  r.nutrient_name,
+  r.intake_value,
+  r.rda_value,
+  r.percent_of_rda,
+  r.comment
+FROM personal_data.daily_nutrient_rollup r;
+
+COMMIT;
+
+-- Example dashboard query
+-- SELECT date, nutrient_name, intake_value, rda_value, percent_of_rda, comment
+-- FROM personal_data.daily_micronutrient_summary_v2
+-- WHERE user_id = 1 AND date BETWEEN '2025-09-01' AND '2025-09-30'
+-- ORDER BY date, nutrient_name;
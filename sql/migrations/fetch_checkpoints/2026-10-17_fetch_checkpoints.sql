@@ -0,0 +1,28 @@
+-- Per-day progress of the FatSecret fetchers, used by --resume and --refetch-older-than
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS personal_data.fetch_checkpoints (
+    user_id INT REFERENCES personal_data.users(id) NOT NULL,
+    method TEXT NOT NULL,                      -- FatSecret API method, e.g. food_entries.get
+    date DATE NOT NULL,                        -- fetched day (first of the month for monthly methods)
+    status TEXT NOT NULL CHECK (status IN ('done', 'failed')),
+    fetched_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, method, date)
+);
+
+-- Monthly checkpoints used to be keyed on whichever day the month was requested for; fold them onto
+-- the first of the month, keeping the latest fetch
+INSERT INTO personal_data.fetch_checkpoints (user_id, method, date, status, fetched_at)
+SELECT DISTINCT ON (user_id, method, date_trunc('month', date))
+    user_id, method, date_trunc('month', date)::date, status, fetched_at
+FROM personal_data.fetch_checkpoints
+WHERE method = 'weights.get_month.v2'
+ORDER BY user_id, method, date_trunc('month', date), fetched_at DESC
+ON CONFLICT (user_id, method, date) DO UPDATE SET
+    status = EXCLUDED.status,
+    fetched_at = EXCLUDED.fetched_at
+WHERE personal_data.fetch_checkpoints.fetched_at < EXCLUDED.fetched_at;
+
+DELETE FROM personal_data.fetch_checkpoints
+WHERE method = 'weights.get_month.v2'
+AND date <> date_trunc('month', date)::date;
@@ -0,0 +1,50 @@
+-- Watermarks for incremental enrichment: an entry needs (re-)estimation when it has no
+-- nutrient rows, or when food_entries.updated_at is newer than its nutrients' enriched_at.
+-- Safe to run multiple times
+
+BEGIN;
+
+-- Normalized per-entry nutrients written by ai-estimate-nutrition-details.py
+CREATE TABLE IF NOT EXISTS personal_data.food_entry_nutrients (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES personal_data.users(id),
+    food_entry_id INT REFERENCES personal_data.food_entries(id),
+    date DATE NOT NULL,
+    nutrient_id INT REFERENCES personal_data.nutrients(id) ON DELETE RESTRICT,
+    amount FLOAT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (food_entry_id, nutrient_id)
+);
+
+ALTER TABLE personal_data.food_entries
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+ALTER TABLE personal_data.food_entry_nutrients
+    ADD COLUMN IF NOT EXISTS enriched_at TIMESTAMPTZ DEFAULT NOW();
+
+-- updated_at only moves when the entry's content changes: the hourly fetch re-upserts every entry
+-- of yesterday and today, and bumping the watermark on those no-op updates would queue the whole
+-- window for re-estimation again
+CREATE OR REPLACE FUNCTION personal_data.food_entries_touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'updated_at') IS DISTINCT FROM (to_jsonb(OLD) - 'updated_at') THEN
+        NEW.updated_at := NOW();
+    ELSE
+        NEW.updated_at := OLD.updated_at;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS food_entries_touch_updated_at ON personal_data.food_entries;
+CREATE TRIGGER food_entries_touch_updated_at
+    BEFORE UPDATE ON personal_data.food_entries
+    FOR EACH ROW EXECUTE FUNCTION personal_data.food_entries_touch_updated_at();
+
+-- Both columns are back-filled with the same transaction timestamp, so everything that is
+-- already enriched counts as up to date
+
+COMMIT;
@@ -0,0 +1,17 @@
+-- Per-unit nutrient estimates keyed by normalized food, reused across enrichment runs
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS personal_data.food_nutrient_estimate_cache (
+    id SERIAL PRIMARY KEY,
+    food_key TEXT NOT NULL,                    -- lower-cased, whitespace-collapsed food name
+    fatsecret_food_id TEXT NOT NULL DEFAULT '',
+    unit TEXT NOT NULL DEFAULT '',
+    cache_version TEXT NOT NULL,               -- hash of model name + prompt; bumps invalidate old rows
+    nutrients_per_unit JSONB NOT NULL,         -- e.g. {"protein_g": 4.2, "iron_mg": 0.3}
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (food_key, fatsecret_food_id, unit, cache_version)
+);
+
+-- Drop entries written by older prompt/model versions
+-- DELETE FROM personal_data.food_nutrient_estimate_cache WHERE cache_version <> '<current version>';
@@ -0,0 +1,137 @@
+-- Range-partition the per-nutrient fact tables by month on `date`.
+-- Each food entry becomes ~27 nutrient rows, so these tables outgrow food_entries quickly; with
+-- monthly partitions a dashboard date range only touches the months it covers, and old months can
+-- be archived by detaching a partition instead of deleting rows.
+--
+-- Partitioned tables need the partition key in every unique constraint, so:
+--   food_entry_nutrients:        PRIMARY KEY (id, date), UNIQUE (food_entry_id, nutrient_id, date)
+--   estimated_food_nutrients_v2: PRIMARY KEY (id, date)
+-- Future partitions are created by ensure-nutrient-partitions.py (run_hourly.sh) and by the writer.
+-- Run once; it rewrites both tables inside one transaction.
+
+BEGIN;
+
+-- Create monthly partitions personal_data.<parent>_YYYY_MM covering p_from..p_to; returns how many were new
+CREATE OR REPLACE FUNCTION personal_data.create_monthly_partitions(p_parent TEXT, p_from DATE, p_to DATE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= p_to LOOP
+        partition_name := p_parent || '_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass('personal_data.' || partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE personal_data.%I PARTITION OF personal_data.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, p_parent, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+
+-- 1) food_entry_nutrients (written by ai-estimate-nutrition-details.py)
+ALTER TABLE personal_data.food_entry_nutrients RENAME TO food_entry_nutrients_unpartitioned;
+
+CREATE TABLE personal_data.food_entry_nutrients (
+    id INT NOT NULL DEFAULT nextval('personal_data.food_entry_nutrients_id_seq'),
+    user_id INT REFERENCES personal_data.users(id),
+    food_entry_id INT REFERENCES personal_data.food_entries(id),
+    date DATE NOT NULL,
+    nutrient_id INT REFERENCES personal_data.nutrients(id) ON DELETE RESTRICT,
+    amount FLOAT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    enriched_at TIMESTAMPTZ DEFAULT NOW()
+) PARTITION BY RANGE (date);
+
+SELECT personal_data.create_monthly_partitions(
+    'food_entry_nutrients',
+    COALESCE((SELECT MIN(date) FROM personal_data.food_entry_nutrients_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO personal_data.food_entry_nutrients (id, user_id, food_entry_id, date, nutrient_id, amount, created_at, enriched_at)
+SELECT id, user_id, food_entry_id, date, nutrient_id, amount, created_at, enriched_at
+FROM personal_data.food_entry_nutrients_unpartitioned;
+
+ALTER SEQUENCE personal_data.food_entry_nutrients_id_seq OWNED BY personal_data.food_entry_nutrients.id;
+DROP TABLE personal_data.food_entry_nutrients_unpartitioned;
+
+ALTER TABLE personal_data.food_entry_nutrients ADD PRIMARY KEY (id, date);
+ALTER TABLE personal_data.food_entry_nutrients ADD UNIQUE (food_entry_id, nutrient_id, date);
+CREATE INDEX IF NOT EXISTS food_entry_nutrients_user_date_idx
+    ON personal_data.food_entry_nutrients (user_id, date)
+    INCLUDE (nutrient_id, amount);
+
+-- The unique key includes the partition key, so an entry moved to another day would keep its old
+-- nutrient rows next to the new ones. Drop them when the date changes; the delete names the old date,
+-- so it only touches that month's partition. Without nutrients the entry is picked up for enrichment again.
+CREATE OR REPLACE FUNCTION personal_data.food_entries_drop_moved_nutrients()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM personal_data.food_entry_nutrients
+    WHERE food_entry_id = OLD.id
+      AND date = OLD.date;
+    PERFORM personal_data.refresh_daily_nutrient_rollup(OLD.user_id, ARRAY[OLD.date]);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS food_entries_drop_moved_nutrients ON personal_data.food_entries;
+CREATE TRIGGER food_entries_drop_moved_nutrients
+    AFTER UPDATE OF date ON personal_data.food_entries
+    FOR EACH ROW
+    WHEN (OLD.date IS DISTINCT FROM NEW.date)
+    EXECUTE FUNCTION personal_data.food_entries_drop_moved_nutrients();
+
+
+-- 2) estimated_food_nutrients_v2 (migrated history)
+ALTER TABLE personal_data.estimated_food_nutrients_v2 RENAME TO estimated_food_nutrients_v2_unpartitioned;
+
+CREATE TABLE personal_data.estimated_food_nutrients_v2 (
+    id INT NOT NULL DEFAULT nextval('personal_data.estimated_food_nutrients_v2_id_seq'),
+    user_id INT REFERENCES personal_data.users(id),
+    food_entry_id INT REFERENCES personal_data.food_entries(id),
+    date DATE NOT NULL,
+    meal_type TEXT,
+    nutrient_id INT REFERENCES personal_data.nutrients(id) ON DELETE RESTRICT,
+    amount FLOAT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+) PARTITION BY RANGE (date);
+
+SELECT personal_data.create_monthly_partitions(
+    'estimated_food_nutrients_v2',
+    COALESCE((SELECT MIN(date) FROM personal_data.estimated_food_nutrients_v2_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+INSERT INTO personal_data.estimated_food_nutrients_v2 (id, user_id, food_entry_id, date, meal_type, nutrient_id, amount, created_at)
+SELECT id, user_id, food_entry_id, date, meal_type, nutrient_id, amount, created_at
+FROM personal_data.estimated_food_nutrients_v2_unpartitioned;
+
+ALTER SEQUENCE personal_data.estimated_food_nutrients_v2_id_seq OWNED BY personal_data.estimated_food_nutrients_v2.id;
+DROP TABLE personal_data.estimated_food_nutrients_v2_unpartitioned;
+
+ALTER TABLE personal_data.estimated_food_nutrients_v2 ADD PRIMARY KEY (id, date);
+CREATE INDEX IF NOT EXISTS estimated_food_nutrients_v2_user_date_idx
+    ON personal_data.estimated_food_nutrients_v2 (user_id, date)
+    INCLUDE (nutrient_id, amount);
+
+COMMIT;
+
+ANALYZE personal_data.food_entry_nutrients;
+ANALYZE personal_data.estimated_food_nutrients_v2;
+
+-- Archiving a month: detach it (instant, no row deletes), dump it, then drop it
+-- ALTER TABLE personal_data.food_entry_nutrients DETACH PARTITION personal_data.food_entry_nutrients_2024_01;
+-- pg_dump -t personal_data.food_entry_nutrients_2024_01 ... > food_entry_nutrients_2024_01.sql
+-- DROP TABLE personal_data.food_entry_nutrients_2024_01;
@@ -0,0 +1,30 @@
+-- Covering indexes for the (user_id, date) access paths used by the enrichment job and the dashboards.
+-- CONCURRENTLY keeps the tables writable while building; run this file outside a transaction block.
+-- Safe to run multiple times, before or after partition_nutrient_facts: the partitioned nutrient
+-- tables (food_entry_nutrients, estimated_food_nutrients_v2) get their (user_id, date) indexes from
+-- that migration, since CREATE INDEX CONCURRENTLY is not supported on partitioned tables
+-- Verify with scripts/fetch-fs-data/check_query_plans.py
+
+-- Daily view / Stats panels: per-user day or time-range aggregates of calories and macros,
+-- and get_food_log_entries_by_date
+CREATE INDEX CONCURRENTLY IF NOT EXISTS food_entries_user_date_idx
+    ON personal_data.food_entries (user_id, date)
+    INCLUDE (meal_type, calories, carbohydrate, protein, fat, fiber);
+
+-- The existing UNIQUE (user_id, date, fatsecret_exercise_id) already leads with (user_id, date);
+-- this one also covers the summed columns
+CREATE INDEX CONCURRENTLY IF NOT EXISTS exercise_entries_user_date_idx
+    ON personal_data.exercise_entries (user_id, date)
+    INCLUDE (calories, duration_minutes);
+
+-- Legacy nutrient estimates read per user and day
+CREATE INDEX CONCURRENTLY IF NOT EXISTS estimated_food_nutrients_user_date_idx
+    ON personal_data.estimated_food_nutrients (user_id, date);
+
+-- weights, date_exclusions, daily_micronutrient_goals_v2, daily_nutrient_goals and
+-- daily_nutrient_rollup are already served by their (user_id, date[, nutrient_id]) unique keys;
+-- NOT EXISTS (... date_exclusions de WHERE de.user_id = ? AND de.date = x.date) probes UNIQUE (user_id, date)
+
+ANALYZE personal_data.food_entries;
+ANALYZE personal_data.exercise_entries;
+ANALYZE personal_data.estimated_food_nutrients;
@@ -0,0 +1,43 @@
+"""Shared helpers for the tests.
+
+Every script dir ships its own `clients` package, so modules are imported through `load()`, which
+gives each script dir a clean `clients` slot in sys.modules, like the ingestion daemon does.
+"""
+import importlib
+import importlib.util
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def _pop_clients_modules():
+    return {
+        name: sys.modules.pop(name)
+        for name in list(sys.modules)
+        if name == "clients" or name.startswith("clients.")
+    }
+
+
+def load(script_dir, module):
+    """Import `module` (a dotted name, or a .py file name) from scripts/`script_dir` and return it.
+
+    Modules are imported fresh on every call, so settings read from the environment at import time
+    follow the calling test.
+    """
+    path = os.path.join(SCRIPTS_DIR, script_dir)
+    saved = _pop_clients_modules()
+    sys.path.insert(0, path)
+    try:
+        if module.endswith(".py"):
+            name = "test_" + module[:-3].replace("-", "_")
+            spec = importlib.util.spec_from_file_location(name, os.path.join(path, module))
+            loaded = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(loaded)
+        else:
+            loaded = importlib.import_module(module)
+    finally:
+        sys.path.remove(path)
+        _pop_clients_modules()
+        sys.modules.update(saved)
+    return loaded
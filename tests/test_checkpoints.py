@@ -0,0 +1,103 @@
+"""Checkpoint freshness (`--refetch-older-than`) against a throwaway Postgres.
+
+Runs against a pgserver-managed Postgres by default. Set TEST_PG_DSN to use an existing database
+instead; the tests create and drop their own `personal_data` tables there.
+"""
+import os
+import tempfile
+from datetime import date
+
+import pytest
+
+from conftest import load
+
+SCRIPT_DIR = "fetch-fs-data"
+DAY = date(2026, 10, 1)
+MONTH = date(2026, 9, 1)
+
+SCHEMA = """
+    CREATE SCHEMA IF NOT EXISTS personal_data;
+    CREATE TABLE IF NOT EXISTS personal_data.users (id SERIAL PRIMARY KEY);
+    CREATE TABLE IF NOT EXISTS personal_data.fetch_checkpoints (
+        user_id INT REFERENCES personal_data.users(id),
+        method TEXT NOT NULL,
+        date DATE NOT NULL,
+        status TEXT NOT NULL,
+        fetched_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (user_id, method, date)
+    );
+    INSERT INTO personal_data.users (id) VALUES (1) ON CONFLICT DO NOTHING;
+"""
+
+
+@pytest.fixture(scope="module")
+def dsn():
+    dsn = os.getenv("TEST_PG_DSN")
+    if dsn:
+        yield dsn
+        return
+
+    pgserver = pytest.importorskip("pgserver")
+    server = pgserver.get_server(tempfile.mkdtemp(), cleanup_mode="stop")
+    yield server.get_uri()
+
+
+@pytest.fixture
+def pg(dsn, monkeypatch):
+    from psycopg2.extensions import parse_dsn
+
+    params = parse_dsn(dsn)
+    for key, env in (("host", "PG_HOST"), ("port", "PG_PORT"), ("user", "PG_USER"),
+                     ("password", "PG_PASSWORD"), ("dbname", "PG_DB")):
+        if key in params:
+            monkeypatch.setenv(env, params[key])
+    pg = load(SCRIPT_DIR, "clients.pg_client")
+    with pg.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(SCHEMA)
+        cursor.execute("TRUNCATE personal_data.fetch_checkpoints")
+        conn.commit()
+    yield pg
+    pg.close_pool()
+
+
+def checkpoint(pg, day, fetched_at):
+    with pg.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO personal_data.fetch_checkpoints (user_id, method, date, status, fetched_at)
+            VALUES (1, 'food_entries', %s, 'done', %s)
+        """, (day, fetched_at))
+        conn.commit()
+
+
+def completed(pg, day, final_after_days, period="1 day"):
+    return pg.get_completed_dates(1, "food_entries", day, day, final_after_days, period)
+
+
+def test_without_threshold_any_done_checkpoint_counts(pg):
+    checkpoint(pg, DAY, "2026-10-01 12:00+00")
+
+    assert completed(pg, DAY, None) == {DAY}
+
+
+def test_checkpoint_fetched_on_the_same_day_is_not_final(pg):
+    checkpoint(pg, DAY, "2026-10-01 23:59+00")
+
+    assert completed(pg, DAY, 0) == set()
+
+
+def test_checkpoint_fetched_after_the_day_ended_is_final(pg):
+    checkpoint(pg, DAY, "2026-10-02 00:00+00")
+
+    assert completed(pg, DAY, 0) == {DAY}
+    assert completed(pg, DAY, 1) == set()
+
+
+def test_monthly_checkpoint_counts_from_the_end_of_the_month(pg):
+    checkpoint(pg, MONTH, "2026-09-30 23:00+00")
+    assert completed(pg, MONTH, 0, "1 month") == set()
+
+    with pg.get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("UPDATE personal_data.fetch_checkpoints SET fetched_at = '2026-10-03 00:00+00'")
+        conn.commit()
+    assert completed(pg, MONTH, 2, "1 month") == {MONTH}
+    assert completed(pg, MONTH, 3, "1 month") == set()
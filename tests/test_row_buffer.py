@@ -0,0 +1,49 @@
+"""RowBuffer flushing and checkpoint hand-off."""
+import pytest
+
+from conftest import load
+
+
+@pytest.fixture(scope="module")
+def RowBuffer():
+    return load("fetch-fs-data", "clients").RowBuffer
+
+
+class Recorder:
+    def __init__(self, result=True):
+        self.result = result
+        self.calls = []
+
+    def __call__(self, items):
+        self.calls.append(list(items))
+        return self.result
+
+
+def test_flush_passes_checkpoints_after_rows_are_written(RowBuffer):
+    write, save = Recorder({"inserted": 2, "updated": 0, "unchanged": 0}), Recorder()
+
+    with RowBuffer(write, max_rows=10, on_flush=save) as buffer:
+        buffer.add([("a",), ("b",)], checkpoint=(1, "food_entries.get", "2026-10-01", "done"))
+
+    assert write.calls == [[("a",), ("b",)]]
+    assert save.calls == [[(1, "food_entries.get", "2026-10-01", "done")]]
+    assert buffer.flushed_rows == 2
+    assert buffer.counts == {"inserted": 2, "updated": 0, "unchanged": 0}
+
+
+def test_failed_flush_drops_rows_and_checkpoints(RowBuffer):
+    write, save = Recorder(False), Recorder()
+    buffer = RowBuffer(write, max_rows=2, on_flush=save)
+
+    buffer.add([("a",), ("b",)], checkpoint=(1, "food_entries.get", "2026-10-01", "done"))
+
+    assert write.calls == [[("a",), ("b",)]]
+    assert save.calls == []
+    assert buffer.rows == [] and buffer.checkpoints == []
+    assert buffer.flushed_rows == 0
+
+    # A later successful flush does not mark the failed day done
+    write.result = True
+    buffer.add([("c",), ("d",)], checkpoint=(1, "food_entries.get", "2026-10-02", "done"))
+    assert save.calls == [[(1, "food_entries.get", "2026-10-02", "done")]]
+    assert buffer.flushed_rows == 2
@@ -0,0 +1,131 @@
+"""Checksummed journal photo uploads against an S3 stand-in.
+
+Runs against moto by default. Set TEST_S3_ENDPOINT (plus S3_ACCESS_KEY / S3_SECRET_KEY) to run the
+same tests against a local MinIO instead.
+"""
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+
+from conftest import load
+
+SCRIPT_DIR = "parse-fs-site"
+POST_DATE = "2026-10-01"
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    name = f"journal-photos-test-{uuid.uuid4().hex[:8]}"
+    monkeypatch.setenv("S3_BUCKET", name)
+    endpoint = os.getenv("TEST_S3_ENDPOINT")
+    if endpoint:
+        monkeypatch.setenv("S3_ENDPOINT", endpoint)
+        yield name
+        return
+
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("S3_ENDPOINT", "https://s3.amazonaws.com")
+    monkeypatch.setenv("S3_ACCESS_KEY", "testing")
+    monkeypatch.setenv("S3_SECRET_KEY", "testing")
+    with moto.mock_aws():
+        yield name
+
+
+def count_calls(s3, *operations):
+    """Count S3 API calls per operation name made through the client `s3`."""
+    calls = dict.fromkeys(operations, 0)
+
+    def on_call(model, **_):
+        calls[model.name] += 1
+
+    for operation in operations:
+        s3.meta.events.register(f"before-call.s3.{operation}", on_call)
+    return calls
+
+
+@pytest.fixture
+def clients(bucket):
+    clients = load(SCRIPT_DIR, "clients")
+    clients.ensure_bucket_exists(bucket)
+    return clients
+
+
+def test_upload_stores_sha256_metadata(clients, bucket):
+    uploaded, checksum = clients.upload_stream_with_checksum(io.BytesIO(b"photo"), "a.jpg")
+
+    assert uploaded
+    assert checksum == hashlib.sha256(b"photo").hexdigest()
+    assert clients.get_object_checksum("a.jpg") == checksum
+
+
+def test_same_sha256_skips_upload(clients, bucket):
+    clients.upload_stream_with_checksum(io.BytesIO(b"photo"), "a.jpg")
+    calls = count_calls(clients.ensure_bucket_exists(bucket), "PutObject", "CreateMultipartUpload")
+
+    uploaded, checksum = clients.upload_stream_with_checksum(io.BytesIO(b"photo"), "a.jpg")
+
+    assert not uploaded
+    assert checksum is not None
+    assert calls == {"PutObject": 0, "CreateMultipartUpload": 0}
+
+
+def test_changed_content_is_uploaded_again(clients, bucket):
+    _, first = clients.upload_stream_with_checksum(io.BytesIO(b"photo"), "a.jpg")
+
+    uploaded, second = clients.upload_stream_with_checksum(io.BytesIO(b"edited photo"), "a.jpg")
+
+    assert uploaded
+    assert second != first
+    assert clients.get_object_checksum("a.jpg") == second
+
+
+class FakeImageResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return FakeImageResponse(self.body)
+
+
+@pytest.fixture
+def photos(bucket, monkeypatch):
+    photos = load(SCRIPT_DIR, "parse-journal-photos.py")
+    monkeypatch.setattr(photos, "session", FakeSession(b"original image"))
+    monkeypatch.setattr(photos.host_limiter, "wait", lambda url: None)
+    return photos
+
+
+def test_transfer_image_outside_listing_skips_unchanged_image(photos, bucket):
+    s3 = photos.ensure_bucket_exists(bucket)
+    calls = count_calls(s3, "HeadObject", "PutObject", "CreateMultipartUpload")
+
+    assert photos.transfer_image("uuid-1", POST_DATE, set(), set())
+    assert not photos.transfer_image("uuid-1", POST_DATE, set(), set())
+
+    # One checksum HEAD per transfer and a single upload
+    assert calls == {"HeadObject": 2, "PutObject": 1, "CreateMultipartUpload": 0}
+
+
+def test_transfer_image_listed_key_is_not_downloaded(photos, bucket):
+    photos.ensure_bucket_exists(bucket)
+    key = f"{photos.post_date_prefix(POST_DATE)}uuid-1{photos.suff}"
+
+    assert not photos.transfer_image("uuid-1", POST_DATE, {POST_DATE}, {key})
+    assert photos.session.requests == 0